@@ -0,0 +1,42 @@
+"""Index garment OpenAI text embeddings at half precision
+
+Revision ID: 0007_halfvec_text_embedding_index
+Revises: 0006_add_ontology_properties
+Create Date: 2025-08-12 10:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0007_halfvec_text_embedding_index"
+down_revision: Union[str, None] = "0006_add_ontology_properties"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Replace the full-precision garment HNSW index with a halfvec expression index."""
+
+    # halfvec halves index size and the memory traffic of each graph hop; candidates
+    # are re-scored at full precision in the query pipeline (requires pgvector >= 0.7)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_garment_openai_text_embedding_hnsw_half
+        ON garment USING hnsw ((openai_text_embedding_vec::halfvec(1536)) halfvec_cosine_ops)
+        WITH (m = 16, ef_construction = 64)
+    """)
+    op.execute("DROP INDEX IF EXISTS idx_garment_openai_text_embedding_hnsw")
+
+
+def downgrade() -> None:
+    """Restore the full-precision garment HNSW index."""
+
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_garment_openai_text_embedding_hnsw
+        ON garment USING hnsw (openai_text_embedding_vec vector_cosine_ops)
+        WITH (m = 16, ef_construction = 64)
+    """)
+    op.execute("DROP INDEX IF EXISTS idx_garment_openai_text_embedding_hnsw_half")
@@ -0,0 +1,75 @@
+"""Store garment description embeddings as packed float32 bytes
+
+Revision ID: 0008_pack_description_embedding
+Revises: 0007_halfvec_text_embedding_index
+Create Date: 2025-08-14 09:00:00.000000
+
+"""
+
+from collections.abc import Sequence
+from typing import Union
+
+import numpy as np
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0008_pack_description_embedding"
+down_revision: Union[str, None] = "0007_halfvec_text_embedding_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _convert_column(source: sa.types.TypeEngine, target: sa.types.TypeEngine, convert) -> None:
+    """Rewrite garment.description_embedding from ``source`` to ``target`` via ``convert``."""
+    op.add_column("garment", sa.Column("description_embedding_new", target, nullable=True))
+
+    garment = sa.table(
+        "garment",
+        sa.column("id", sa.Integer),
+        sa.column("description_embedding", source),
+        sa.column("description_embedding_new", target),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(garment.c.id, garment.c.description_embedding).where(
+            garment.c.description_embedding.isnot(None)
+        )
+    ).all()
+    # Rows that convert to None are left out so the new column stays SQL NULL
+    converted = [(gid, convert(value)) for gid, value in rows]
+    params = [{"gid": gid, "value": value} for gid, value in converted if value is not None]
+    if params:
+        bind.execute(
+            garment.update()
+            .where(garment.c.id == sa.bindparam("gid"))
+            .values(description_embedding_new=sa.bindparam("value")),
+            params,
+        )
+
+    with op.batch_alter_table("garment") as batch_op:
+        batch_op.drop_column("description_embedding")
+        batch_op.alter_column("description_embedding_new", new_column_name="description_embedding")
+
+
+def _pack(value) -> bytes | None:
+    # Writers store ``embedding or None``; sa.JSON persists that as JSON 'null', which
+    # passes the IS NOT NULL filter and decodes back to None (or an empty list)
+    return np.asarray(value, dtype="<f4").tobytes() if value else None
+
+
+def _unpack(value: bytes) -> list[float] | None:
+    return np.frombuffer(value, dtype="<f4").tolist() if value else None
+
+
+def upgrade() -> None:
+    """Convert JSON float arrays to little-endian float32 bytes (4 bytes per dimension)."""
+
+    _convert_column(sa.JSON(), sa.LargeBinary(), _pack)
+
+
+def downgrade() -> None:
+    """Restore JSON float arrays."""
+
+    _convert_column(sa.LargeBinary(), sa.JSON(), _unpack)
@@ -27,6 +27,7 @@ from ..inventory_processing import (
 )
 from ..inventory_utils import safe_add_garment_attribute
 from ..ontology import attribute_confidences, classify_basic_cached
+from ..vector_utils import set_openai_text_embedding
 
 router = APIRouter(prefix="/inventory", tags=["inventory"])
 
@@ -193,6 +194,7 @@ def inventory_process(data: InventoryProcessRequest) -> dict[str, Any]:
                     g_existing.description = desc
                     if embedding:
                         g_existing.description_embedding = embedding
+                        set_openai_text_embedding(g_existing, embedding)
                 elif not g_existing:
                     g_existing = Garment(
                         external_id=external_id,
@@ -201,6 +203,7 @@ def inventory_process(data: InventoryProcessRequest) -> dict[str, Any]:
                         description_embedding=embedding or None,
                         image_embedding=img_feature or None,
                     )
+                    set_openai_text_embedding(g_existing, embedding)
                     session.add(g_existing)
                     session.flush()
                 if existing_item and data.overwrite:
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import re
 from typing import Any
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 
 from .. import query_pipeline
@@ -116,23 +117,21 @@ _OFF_TOPIC_MARKERS = {
 }
 
 
-def _is_off_topic(q: str) -> tuple[bool, str]:
-    import re as _re
+_ALPHA_TOKEN_RE = re.compile(r"[a-zA-Z]+")
+
 
+def _is_off_topic(q: str) -> tuple[bool, str]:
     norm = q.lower().strip()
     if not norm:
         return True, "empty query"
-    tokens = _re.findall(r"[a-zA-Z]+", norm)
+    tokens = _ALPHA_TOKEN_RE.findall(norm)
     if not tokens:
         return True, "no alpha tokens"
-    if any(t in _OFF_TOPIC_MARKERS for t in tokens):
-        # allow fashion tokens to override
-        fashion_hits = [t for t in tokens if t in _FASHION_VOCAB]
-        if not fashion_hits:
-            return True, "contains off-topic tokens"
-    fashion_hits = [t for t in tokens if t in _FASHION_VOCAB]
-    if fashion_hits:
+    # One hashed probe per token against each vocabulary; fashion tokens override markers
+    if not _FASHION_VOCAB.isdisjoint(tokens):
         return False, "fashion tokens present"
+    if not _OFF_TOPIC_MARKERS.isdisjoint(tokens):
+        return True, "contains off-topic tokens"
     if len(tokens) >= 3:
         return True, "no fashion tokens in multi-word query"
     return False, "short generic allowed"
@@ -176,7 +175,10 @@ class SearchResponse(BaseModel):
 
 
 @router.post("/search", response_model=SearchResponse)
-def search(req: SearchRequest) -> dict[str, Any]:
+def search(
+    req: SearchRequest,
+    deps: query_pipeline.QueryPipelineDeps = Depends(query_pipeline.default_deps),  # noqa: B008
+) -> dict[str, Any]:
     if not req.query.strip():
         raise HTTPException(status_code=400, detail="query must not be empty")
     try:
@@ -197,7 +199,7 @@ def search(req: SearchRequest) -> dict[str, Any]:
                 }
         ambiguous = _is_ambiguous(req.query)
         result = query_pipeline.search(
-            req.query, limit=req.limit or 10, model=req.model, user_id=req.user_id
+            req.query, limit=req.limit or 10, model=req.model, user_id=req.user_id, deps=deps
         )
         if ambiguous:
             clarification = _clarify_query(req.query, req.model)
@@ -7,9 +7,13 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from .. import openai_extractor
-from ..core import embed_text_cached, get_client
+from ..core import embed_text_cached, embed_texts_cached, get_client
 from ..describe_images import describe_image as _orig_describe_image
-from ..refresh_description import DescribeFn, refresh_description_core
+from ..refresh_description import (
+    DescribeFn,
+    refresh_description_core,
+    refresh_descriptions_core,
+)
 
 # Re-export describe_image name for tests that monkeypatch this module directly.
 describe_image = _orig_describe_image
@@ -18,6 +22,7 @@ __all__ = [
     "router",
     "preferences_extract",
     "refresh_description",
+    "refresh_descriptions",
     "describe_image",
 ]
 
@@ -52,21 +57,31 @@ class RefreshDescriptionRequest(BaseModel):
     overwrite: bool = False
 
 
+class RefreshDescriptionsRequest(BaseModel):
+    garment_ids: list[int]
+    model: str | None = None
+    overwrite: bool = False
+
+
+def _optional_client():
+    # For tests we allow operation with or without a real OpenAI key: if missing, no client
+    if "OPENAI_API_KEY" in os.environ and not os.environ.get("OPENAI_API_KEY", " ").startswith(
+        "test-"
+    ):
+        try:
+            return get_client()
+        except Exception:  # pragma: no cover
+            return None
+    return None
+
+
 @router.post("/garments/refresh-description")
 def refresh_description(req: RefreshDescriptionRequest) -> dict[str, object]:
     from ..ingest import get_engine
 
     engine = get_engine()
     with Session(engine) as session:
-        # For tests we allow operation with or without a real OpenAI key: if missing, no client
-        client = None
-        if "OPENAI_API_KEY" in os.environ and not os.environ.get("OPENAI_API_KEY", " ").startswith(
-            "test-"
-        ):
-            try:
-                client = get_client()
-            except Exception:  # pragma: no cover
-                client = None
+        client = _optional_client()
         try:
             # Prefer module-level describe_image; fall back to main if only patched there.
             # Module level symbol (monkeypatched in tests) else fallback
@@ -86,4 +101,32 @@ def refresh_description(req: RefreshDescriptionRequest) -> dict[str, object]:
             raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+@router.post("/garments/refresh-descriptions")
+def refresh_descriptions(req: RefreshDescriptionsRequest) -> dict[str, object]:
+    """Bulk refresh: one vision call per garment, one embeddings request for the batch."""
+    from ..ingest import get_engine
+
+    if not req.garment_ids:
+        raise HTTPException(status_code=400, detail="garment_ids must not be empty")
+    engine = get_engine()
+    with Session(engine) as session:
+        client = _optional_client()
+        try:
+            describe_fn: DescribeFn = globals().get("describe_image", _orig_describe_image)  # type: ignore[assignment]
+            results = refresh_descriptions_core(
+                session,
+                req.garment_ids,
+                overwrite=req.overwrite,
+                model=req.model or "gpt-4o-mini",
+                describe_fn=describe_fn,
+                embed_many_fn=embed_texts_cached,
+                client=client,
+            )
+            return {"results": results}
+        except HTTPException:
+            raise
+        except Exception as e:  # noqa: BLE001
+            raise HTTPException(status_code=500, detail=str(e)) from e
+
+
 ## Legacy routes removed (tests now target /user paths directly)
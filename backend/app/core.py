@@ -4,7 +4,7 @@ import os
 
 from openai import OpenAI
 
-from .describe_images import embed_text
+from .describe_images import embed_text, embed_texts
 
 client: OpenAI | None = None
 _EMBED_TEXT_CACHE: dict[str, list[float]] = {}
@@ -31,6 +31,21 @@ def embed_text_cached(text: str) -> list[float]:
     return vec
 
 
+def embed_texts_cached(texts: list[str]) -> list[list[float]]:
+    """Batch variant of embed_text_cached: cache misses go out in one embeddings request."""
+    keys = [t.strip() for t in texts]
+    found = {k: _EMBED_TEXT_CACHE[k] for k in keys if k in _EMBED_TEXT_CACHE}
+    missing = list(dict.fromkeys(k for k in keys if k not in found))
+    if missing:
+        vecs = embed_texts(get_client(), missing)
+        if len(_EMBED_TEXT_CACHE) > 2048:
+            _EMBED_TEXT_CACHE.clear()
+        for k, vec in zip(missing, vecs, strict=True):
+            _EMBED_TEXT_CACHE[k] = vec
+            found[k] = vec
+    return [found[k] for k in keys]
+
+
 def clear_embedding_cache() -> int:
     size = len(_EMBED_TEXT_CACHE)
     _EMBED_TEXT_CACHE.clear()
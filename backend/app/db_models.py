@@ -5,6 +5,7 @@ from __future__ import annotations
 from datetime import UTC, datetime
 from typing import Any
 
+import numpy as np
 from sqlalchemy import (
     JSON,
     Boolean,
@@ -12,8 +13,10 @@ from sqlalchemy import (
     Float,
     ForeignKey,
     Integer,
+    LargeBinary,
     MetaData,
     String,
+    TypeDecorator,
     UniqueConstraint,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
@@ -30,6 +33,27 @@ except ImportError:
         return JSON
 
 
+class Float32Array(TypeDecorator):
+    """Embedding stored as packed little-endian float32 bytes (4 bytes per dimension).
+
+    Accepts any float sequence on write and returns a plain ``list[float]`` on read, so
+    callers keep list semantics while rows skip JSON encoding and parsing.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Any) -> bytes | None:  # noqa: ARG002
+        if value is None:
+            return None
+        return np.asarray(value, dtype="<f4").tobytes()
+
+    def process_result_value(self, value: Any, dialect: Any) -> list[float] | None:  # noqa: ARG002
+        if value is None:
+            return None
+        return np.frombuffer(value, dtype="<f4").tolist()
+
+
 metadata_obj = MetaData()
 
 
@@ -49,7 +73,7 @@ class Garment(Base):
 
     # Legacy JSON embeddings (for backward compatibility)
     image_embedding: Mapped[list[float] | None] = mapped_column(JSON)
-    description_embedding: Mapped[list[float] | None] = mapped_column(JSON)
+    description_embedding: Mapped[list[float] | None] = mapped_column(Float32Array)
 
     # New native vector embeddings (optimal performance)
     image_embedding_vec: Mapped[Any] = mapped_column(Vector(512), nullable=True)
@@ -91,6 +91,23 @@ def embed_text(client: Any, text: str) -> list[float]:
     return []
 
 
+def embed_texts(client: Any, texts: list[str]) -> list[list[float]]:
+    """Embed several texts with a single embeddings request (order preserved).
+
+    Falls back to empty vectors for every input if the request fails, mirroring embed_text.
+    """
+    if not texts:
+        return []
+    try:
+        emb = client.embeddings.create(model=EMBED_MODEL, input=texts)
+        data = sorted(getattr(emb, "data", []), key=lambda d: getattr(d, "index", 0))
+        if len(data) == len(texts):
+            return [[float(x) for x in d.embedding] for d in data]
+    except Exception:  # noqa: BLE001
+        pass
+    return [[] for _ in texts]
+
+
 def compute_image_hash(path: Path) -> str:
     import hashlib
 
@@ -9,12 +9,14 @@ Features:
 - CLIP visual embeddings (512-dimensional)
 - Fallback to deterministic hash-based features
 - LRU cache for performance
+- Optional on-disk CLIP embedding cache (``IMAGE_FEATURE_CACHE_DIR``)
 - Same public API for backward compatibility
 """
 
 from __future__ import annotations
 
 import logging
+import os
 from contextlib import suppress
 from hashlib import blake2b
 from pathlib import Path
@@ -40,6 +42,14 @@ _FEATURE_CACHE_HITS = 0
 _FEATURE_CACHE_MISSES = 0
 _FEATURE_CACHE_EVICTIONS = 0
 
+# Persistent CLIP embedding cache: <dir>/_clip_cache.npy holds N records of
+# ("path:mtime_ns:size" key, FEATURE_DIM float32 vector), opened memory-mapped. Keys live in
+# the same file as the vectors so a single os.replace swaps both; concurrent writers can
+# lose each other's entries but never pair a key with another writer's row. Only CLIP
+# vectors are stored; the hash fallback is cheap to recompute.
+_DISK_CACHE_FILE = "_clip_cache.npy"
+_disk_cache: tuple[Path, dict[str, int], np.ndarray | None] | None = None
+
 # Global CLIP analyzer instance (lazy initialization)
 _clip_analyzer: LocalGarmentAnalyzer | None = None
 
@@ -88,6 +98,81 @@ def _hash_bytes(data: bytes) -> np.ndarray:
     return (arr / norm).astype("float32")
 
 
+def _disk_cache_dir() -> Path | None:
+    root = os.getenv("IMAGE_FEATURE_CACHE_DIR")
+    return Path(root) if root else None
+
+
+def _disk_cache_state(root: Path) -> tuple[dict[str, int], np.ndarray | None]:
+    """Key index and memory-mapped records for ``root``, loaded once per directory."""
+    global _disk_cache
+    if _disk_cache is None or _disk_cache[0] != root:
+        index: dict[str, int] = {}
+        records: np.ndarray | None = None
+        with suppress(OSError, ValueError):
+            records = np.load(root / _DISK_CACHE_FILE, mmap_mode="r")
+        if (
+            records is None
+            or records.ndim != 1
+            or records.dtype.names != ("key", "vec")
+            or records.dtype["vec"].shape != (FEATURE_DIM,)
+        ):
+            records = None  # missing, or written by an older layout
+        else:
+            index = {str(key): row for row, key in enumerate(records["key"])}
+        _disk_cache = (root, index, records)
+    return _disk_cache[1], _disk_cache[2]
+
+
+def _disk_cache_key(path: Path) -> str | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return f"{path.resolve()}:{st.st_mtime_ns}:{st.st_size}"
+
+
+def _disk_cache_get(path: Path) -> np.ndarray | None:
+    root = _disk_cache_dir()
+    key = _disk_cache_key(path) if root else None
+    if key is None:
+        return None
+    index, records = _disk_cache_state(root)
+    row = index.get(key)
+    if row is None or records is None:
+        return None
+    return np.array(records["vec"][row], dtype="float32")
+
+
+def _disk_cache_put(path: Path, vec: np.ndarray) -> None:
+    """Append ``vec`` and atomically replace the cache file (misses only, so rare)."""
+    global _disk_cache
+    root = _disk_cache_dir()
+    key = _disk_cache_key(path) if root else None
+    if key is None:
+        return
+    _, records = _disk_cache_state(root)
+    keys = [*(records["key"].tolist() if records is not None else []), key]
+    updated = np.empty(
+        len(keys),
+        dtype=[("key", f"U{max(map(len, keys))}"), ("vec", "<f4", (FEATURE_DIM,))],
+    )
+    updated["key"] = keys
+    if records is not None:
+        updated["vec"][:-1] = records["vec"]
+    updated["vec"][-1] = vec.reshape(FEATURE_DIM)
+    try:
+        root.mkdir(parents=True, exist_ok=True)
+        tmp = root / f"{_DISK_CACHE_FILE}.{os.getpid()}.tmp"
+        with tmp.open("wb") as fh:
+            np.save(fh, updated)
+        os.replace(tmp, root / _DISK_CACHE_FILE)
+    except OSError as e:  # pragma: no cover - cache is best effort
+        logger.warning(f"Could not persist CLIP feature cache in {root}: {e}")
+        return
+    _disk_cache = None  # re-map the rewritten file on next access
+
+
 def _compute(path: Path) -> np.ndarray:
     """
     Compute image features using CLIP visual embeddings with hash fallback.
@@ -98,6 +183,10 @@ def _compute(path: Path) -> np.ndarray:
     Returns:
         512-dimensional feature vector as numpy array
     """
+    persisted = _disk_cache_get(path)
+    if persisted is not None:
+        return persisted
+
     # Try CLIP visual embeddings first
     analyzer = _get_clip_analyzer()
     if analyzer is not None:
@@ -111,7 +200,9 @@ def _compute(path: Path) -> np.ndarray:
             embedding = analyzer.get_image_embedding(image)
             if embedding is not None and len(embedding) == FEATURE_DIM:
                 logger.debug(f"Generated CLIP embedding for {path.name}")
-                return np.array(embedding, dtype="float32")
+                vec = np.array(embedding, dtype="float32")
+                _disk_cache_put(path, vec)
+                return vec
             else:
                 logger.warning(f"CLIP embedding failed for {path.name}, falling back to hash")
         except Exception as e:
@@ -9,6 +9,7 @@ from __future__ import annotations
 import base64 as _b64
 import hashlib
 import json as _json
+import math
 import os
 from pathlib import Path
 from typing import Any
@@ -43,6 +44,12 @@ def standardize_and_optimize(path: str) -> tuple[str, int, int, str]:
     max_dim = int(os.getenv("INVENTORY_MAX_DIM", "1024"))
     p = Path(path)
     with Image.open(p) as im:
+        w, h = im.size  # header only; nothing decoded yet
+        if max(w, h) > max_dim:
+            # Let libjpeg IDCT at 1/2..1/8 scale while still landing >= the target size;
+            # a no-op for non-JPEG sources
+            scale = max_dim / float(max(w, h))
+            im.draft("RGB", (math.ceil(w * scale), math.ceil(h * scale)))
         im = im.convert("RGB")
         w, h = im.size
         if max(w, h) > max_dim:
@@ -3,7 +3,9 @@ Local computer vision module for garment analysis.
 Uses CLIP (Contrastive Language-Image Pre-training) for garment classification and description.
 """
 
+import copy
 import logging
+from hashlib import blake2b
 from typing import Any, Optional
 
 import torch
@@ -126,10 +128,16 @@ class LocalGarmentAnalyzer:
         "waterproof",
     ]
 
+    # Max number of per-image analysis results kept in memory
+    ANALYSIS_CACHE_MAX = 128
+
     def __init__(self):
         """Initialize the local garment analyzer."""
         self.model = None
         self.processor = None
+        self._analysis_cache: dict[str, dict[str, Any]] = {}
+        # Prompt sets are fixed per garment label, so their text embeddings are reusable
+        self._text_feature_cache: dict[tuple[str, ...], torch.Tensor] = {}
         self._initialize_model()
 
     def _initialize_model(self) -> None:
@@ -164,38 +172,134 @@ class LocalGarmentAnalyzer:
         Returns:
             Dictionary containing garment analysis results
         """
+        return self.analyze_images([image])[0]
+
+    def analyze_images(self, images: list[Image.Image]) -> list[dict[str, Any]]:
+        """
+        Analyze several garment images with a single batched CLIP image-encoder pass.
+
+        Args:
+            images: PIL Images of garments
+
+        Returns:
+            One analysis dictionary per image, in input order
+        """
         if not self._is_available():
-            return self._get_fallback_response()
+            return [self._get_fallback_response() for _ in images]
+
+        # Identical pixel content yields identical CLIP output; skip re-running the model
+        keys = [self._image_cache_key(image) for image in images]
+        results: list[dict[str, Any] | None] = [
+            None if (cached := self._analysis_cache.get(key)) is None else copy.deepcopy(cached)
+            for key in keys
+        ]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results  # type: ignore[return-value]
 
         try:
-            # Classify garments in the image
-            garments = self._classify_garments(image)
-
-            # Extract attributes for each garment
-            attributes = {}
-            for garment in garments:
-                attributes[garment["name"]] = {
-                    "colors": self._classify_colors(image, garment["name"]),
-                    "styles": self._classify_styles(image, garment["name"]),
-                    "materials": self._classify_materials(image, garment["name"]),
-                }
-
-            # Generate natural language description
-            description = self._generate_description(garments, attributes)
-
-            return {
-                "garments": garments,
-                "attributes": attributes,
-                "description": description,
-                "confidence": (
-                    sum(g["confidence"] for g in garments) / len(garments) if garments else 0.0
-                ),
-                "model": "local-clip-vit-base-patch32",
+            features = self._image_features([images[i] for i in pending])
+        except Exception as e:
+            logger.error(f"Error analyzing images: {e}")
+            features = None
+
+        for row, i in enumerate(pending):
+            if features is None:
+                results[i] = self._get_fallback_response()
+                continue
+            try:
+                result = self._analyze_features(features[row])
+            except Exception as e:
+                logger.error(f"Error analyzing image: {e}")
+                results[i] = self._get_fallback_response()
+                continue
+            if len(self._analysis_cache) >= self.ANALYSIS_CACHE_MAX:
+                # Evict oldest entry (dicts preserve insertion order)
+                self._analysis_cache.pop(next(iter(self._analysis_cache)))
+            self._analysis_cache[keys[i]] = copy.deepcopy(result)
+            results[i] = result
+        return results  # type: ignore[return-value]
+
+    def clear_analysis_cache(self) -> None:
+        """Forget memoized per-image results, e.g. so timings measure model inference."""
+        self._analysis_cache.clear()
+
+    def _analyze_features(self, image_feature: torch.Tensor) -> dict[str, Any]:
+        """Build the analysis result for one image from its normalized CLIP embedding."""
+        # Classify garments in the image
+        garments = self._classify_garments(image_feature)
+
+        # Extract attributes for each garment
+        attributes = {}
+        for garment in garments:
+            attributes[garment["name"]] = {
+                "colors": self._classify_colors(image_feature, garment["name"]),
+                "styles": self._classify_styles(image_feature, garment["name"]),
+                "materials": self._classify_materials(image_feature, garment["name"]),
             }
 
-        except Exception as e:
-            logger.error(f"Error analyzing image: {e}")
-            return self._get_fallback_response()
+        # Generate natural language description
+        description = self._generate_description(garments, attributes)
+
+        return {
+            "garments": garments,
+            "attributes": attributes,
+            "description": description,
+            "confidence": (
+                sum(g["confidence"] for g in garments) / len(garments) if garments else 0.0
+            ),
+            "model": "local-clip-vit-base-patch32",
+        }
+
+    def _image_features(self, images: list[Image.Image]) -> torch.Tensor:
+        """L2-normalized CLIP image embeddings, shape (B, D), from one batched forward pass."""
+        inputs = self.processor(images=images, return_tensors="pt")
+        with torch.no_grad():
+            features = self.model.get_image_features(**inputs)
+        return features / features.norm(dim=-1, keepdim=True)
+
+    def _text_features(self, prompts: tuple[str, ...]) -> torch.Tensor:
+        """L2-normalized CLIP text embeddings for a prompt set; encoded once and cached."""
+        cached = self._text_feature_cache.get(prompts)
+        if cached is None:
+            inputs = self.processor(text=list(prompts), return_tensors="pt", padding=True)
+            with torch.no_grad():
+                features = self.model.get_text_features(**inputs)
+            cached = features / features.norm(dim=-1, keepdim=True)
+            self._text_feature_cache[prompts] = cached
+        return cached
+
+    def _zero_shot(
+        self,
+        image_feature: torch.Tensor,
+        prompts: list[str],
+        labels: list[str],
+        top_k: int,
+        threshold: float,
+    ) -> list[tuple[str, float]]:
+        """Top-k (label, probability) pairs above ``threshold`` for one image embedding.
+
+        Same probabilities as ``CLIPModel(...).logits_per_image.softmax``, computed from
+        precomputed embeddings so neither encoder re-runs.
+        """
+        text_features = self._text_features(tuple(prompts))
+        with torch.no_grad():
+            logits = self.model.logit_scale.exp() * (text_features @ image_feature)
+            probs = logits.softmax(dim=-1)
+        top_probs, top_indices = torch.topk(probs, min(top_k, len(labels)))
+        return [
+            (labels[int(idx)], float(prob))
+            for prob, idx in zip(top_probs, top_indices, strict=True)
+            if float(prob) > threshold
+        ]
+
+    @staticmethod
+    def _image_cache_key(image: Image.Image) -> str:
+        """Content hash of an image (mode + size + pixels) used as analysis cache key."""
+        h = blake2b(digest_size=8)
+        h.update(f"{image.mode}:{image.size}".encode())
+        h.update(image.tobytes())
+        return h.hexdigest()
 
     def get_image_embedding(self, image: Image.Image) -> Optional[list[float]]:
         """
@@ -267,142 +371,63 @@ class LocalGarmentAnalyzer:
             logger.error(f"Error generating CLIP text embedding: {e}")
             return None
 
-    def _classify_garments(self, image: Image.Image) -> list[dict[str, Any]]:
+    def _classify_garments(self, image_feature: torch.Tensor) -> list[dict[str, Any]]:
         """Classify garments in the image using CLIP."""
-        if not self._is_available():
-            return []
-
         try:
             # Prepare text prompts for garment classification
             text_prompts = [f"a photo of {garment}" for garment in self.GARMENT_CATEGORIES]
-
-            # Process inputs
-            inputs = self.processor(
-                text=text_prompts, images=image, return_tensors="pt", padding=True
+            matches = self._zero_shot(
+                image_feature, text_prompts, self.GARMENT_CATEGORIES, top_k=3, threshold=0.1
             )
-
-            # Get predictions
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                logits_per_image = outputs.logits_per_image
-                probs = logits_per_image.softmax(dim=1)[0]
-
-            # Get top predictions
-            top_k = min(3, len(self.GARMENT_CATEGORIES))
-            top_probs, top_indices = torch.topk(probs, top_k)
-
-            garments = []
-            for prob, idx in zip(top_probs, top_indices):
-                confidence = float(prob)
-                if confidence > 0.1:  # Minimum confidence threshold
-                    garments.append(
-                        {
-                            "name": self.GARMENT_CATEGORIES[idx],
-                            "confidence": confidence,
-                            "category": "clothing",
-                        }
-                    )
-
-            return garments
+            return [
+                {"name": name, "confidence": confidence, "category": "clothing"}
+                for name, confidence in matches
+            ]
 
         except Exception as e:
             logger.error(f"Error classifying garments: {e}")
             return []
 
-    def _classify_colors(self, image: Image.Image, garment: str) -> list[dict[str, Any]]:
+    def _classify_colors(self, image_feature: torch.Tensor, garment: str) -> list[dict[str, Any]]:
         """Classify colors for a specific garment."""
-        if not self._is_available():
-            return []
-
         try:
             text_prompts = [f"a {color} {garment}" for color in self.COLOR_CATEGORIES]
-
-            inputs = self.processor(
-                text=text_prompts, images=image, return_tensors="pt", padding=True
+            # Higher threshold for colors
+            matches = self._zero_shot(
+                image_feature, text_prompts, self.COLOR_CATEGORIES, top_k=2, threshold=0.15
             )
-
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                logits_per_image = outputs.logits_per_image
-                probs = logits_per_image.softmax(dim=1)[0]
-
-            # Get top color predictions
-            top_k = min(2, len(self.COLOR_CATEGORIES))
-            top_probs, top_indices = torch.topk(probs, top_k)
-
-            colors = []
-            for prob, idx in zip(top_probs, top_indices):
-                confidence = float(prob)
-                if confidence > 0.15:  # Higher threshold for colors
-                    colors.append({"name": self.COLOR_CATEGORIES[idx], "confidence": confidence})
-
-            return colors
+            return [{"name": name, "confidence": confidence} for name, confidence in matches]
 
         except Exception as e:
             logger.error(f"Error classifying colors: {e}")
             return []
 
-    def _classify_styles(self, image: Image.Image, garment: str) -> list[dict[str, Any]]:
+    def _classify_styles(self, image_feature: torch.Tensor, garment: str) -> list[dict[str, Any]]:
         """Classify style for a specific garment."""
-        if not self._is_available():
-            return []
-
         try:
             text_prompts = [f"a {style} {garment}" for style in self.STYLE_CATEGORIES]
-
-            inputs = self.processor(
-                text=text_prompts, images=image, return_tensors="pt", padding=True
+            # Higher threshold for styles
+            matches = self._zero_shot(
+                image_feature, text_prompts, self.STYLE_CATEGORIES, top_k=2, threshold=0.2
             )
-
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                logits_per_image = outputs.logits_per_image
-                probs = logits_per_image.softmax(dim=1)[0]
-
-            top_probs, top_indices = torch.topk(probs, 2)
-
-            styles = []
-            for prob, idx in zip(top_probs, top_indices):
-                confidence = float(prob)
-                if confidence > 0.2:  # Higher threshold for styles
-                    styles.append({"name": self.STYLE_CATEGORIES[idx], "confidence": confidence})
-
-            return styles
+            return [{"name": name, "confidence": confidence} for name, confidence in matches]
 
         except Exception as e:
             logger.error(f"Error classifying styles: {e}")
             return []
 
-    def _classify_materials(self, image: Image.Image, garment: str) -> list[dict[str, Any]]:
+    def _classify_materials(
+        self, image_feature: torch.Tensor, garment: str
+    ) -> list[dict[str, Any]]:
         """Classify materials for a specific garment."""
-        if not self._is_available():
-            return []
-
         try:
             text_prompts = [
                 f"a {garment} made of {material}" for material in self.MATERIAL_CATEGORIES
             ]
-
-            inputs = self.processor(
-                text=text_prompts, images=image, return_tensors="pt", padding=True
+            matches = self._zero_shot(
+                image_feature, text_prompts, self.MATERIAL_CATEGORIES, top_k=2, threshold=0.15
             )
-
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                logits_per_image = outputs.logits_per_image
-                probs = logits_per_image.softmax(dim=1)[0]
-
-            top_probs, top_indices = torch.topk(probs, 2)
-
-            materials = []
-            for prob, idx in zip(top_probs, top_indices):
-                confidence = float(prob)
-                if confidence > 0.15:  # Threshold for materials
-                    materials.append(
-                        {"name": self.MATERIAL_CATEGORIES[idx], "confidence": confidence}
-                    )
-
-            return materials
+            return [{"name": name, "confidence": confidence} for name, confidence in matches]
 
         except Exception as e:
             logger.error(f"Error classifying materials: {e}")
@@ -26,6 +26,7 @@ from .config import settings
 from .core import clear_embedding_cache, get_client
 from .describe_images import describe_image, embed_text
 from .health_simple import router as health_router
+from .ingest import dispose_engines
 from .observability_simple import (
     create_prometheus_metrics_endpoint,
     get_logger,
@@ -90,6 +91,7 @@ async def startup_event():
 async def shutdown_event():
     """Application shutdown event."""
     logger.info("Shutting down Prethrift API")
+    dispose_engines()
 
 
 @app.get("/")
@@ -3,7 +3,6 @@
 import os
 import time
 import uuid
-from contextlib import asynccontextmanager
 from typing import Optional
 
 import structlog
@@ -121,68 +120,56 @@ def get_logger(name: Optional[str] = None):
 
 
 # Context managers for operation tracking
-@asynccontextmanager
-async def track_search_operation(search_type: str, logger=None):
+class _TrackedOperation:
+    """Async context manager that logs start, completion and failure of an operation.
+
+    Implemented as a plain class rather than via ``asynccontextmanager`` since it
+    wraps every search/embedding call and the generator machinery is pure overhead.
+    """
+
+    __slots__ = ("_label", "_field", "_value", "_logger", "_start_time")
+
+    def __init__(self, label: str, field: str, value: str, logger=None):
+        self._label = label
+        self._field = field
+        self._value = value
+        self._logger = logger if logger is not None else get_logger()
+        self._start_time = 0.0
+
+    async def __aenter__(self):
+        self._start_time = time.perf_counter()
+        self._logger.info(f"{self._label} operation started", **{self._field: self._value})
+        return None
+
+    async def __aexit__(self, exc_type, exc, tb):
+        duration_ms = round((time.perf_counter() - self._start_time) * 1000, 2)
+        if exc is None:
+            self._logger.info(
+                f"{self._label} operation completed",
+                **{self._field: self._value},
+                duration_ms=duration_ms,
+            )
+        else:
+            self._logger.error(
+                f"{self._label} operation failed",
+                **{self._field: self._value},
+                error=str(exc),
+                error_type=exc_type.__name__,
+                duration_ms=duration_ms,
+                exc_info=(exc_type, exc, tb),
+            )
+        # Never suppress the exception
+        return False
+
+
+def track_search_operation(search_type: str, logger=None) -> _TrackedOperation:
     """Context manager for tracking search operations."""
-    if logger is None:
-        logger = get_logger()
-
-    start_time = time.time()
-
-    try:
-        logger.info("Search operation started", search_type=search_type)
-        yield
-
-        duration = time.time() - start_time
-        logger.info(
-            "Search operation completed",
-            search_type=search_type,
-            duration_ms=round(duration * 1000, 2),
-        )
-
-    except Exception as exc:
-        duration = time.time() - start_time
-        logger.error(
-            "Search operation failed",
-            search_type=search_type,
-            error=str(exc),
-            error_type=type(exc).__name__,
-            duration_ms=round(duration * 1000, 2),
-            exc_info=True,
-        )
-        raise
+    return _TrackedOperation("Search", "search_type", search_type, logger)
 
 
-@asynccontextmanager
-async def track_embedding_operation(operation_type: str, logger=None):
+def track_embedding_operation(operation_type: str, logger=None) -> _TrackedOperation:
     """Context manager for tracking embedding operations."""
-    if logger is None:
-        logger = get_logger()
-
-    start_time = time.time()
-
-    try:
-        logger.info("Embedding operation started", operation_type=operation_type)
-        yield
-
-        duration = time.time() - start_time
-        logger.info(
-            "Embedding operation completed",
-            operation_type=operation_type,
-            duration_ms=round(duration * 1000, 2),
-        )
-
-    except Exception as exc:
-        duration = time.time() - start_time
-        logger.error(
-            "Embedding operation failed",
-            operation_type=operation_type,
-            error=str(exc),
-            error_type=type(exc).__name__,
-            duration_ms=round(duration * 1000, 2),
-            exc_info=True,
-        )
-        raise
+    return _TrackedOperation("Embedding", "operation_type", operation_type, logger)
 
 
 def create_prometheus_metrics_endpoint():
@@ -11,6 +11,7 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
+from functools import lru_cache
 
 
 @dataclass(frozen=True)
@@ -1347,7 +1348,71 @@ def all_values() -> dict[str, list[str]]:
     return {k: sorted(v) for k, v in ONTOLOGY.items()}
 
 
+# Families scanned for literal ontology terms by classify_basic, in match order
+_CLASSIFY_FAMILIES = (
+    "category",
+    "subcategory",
+    "era",
+    "brand",
+    "style",
+    "color_primary",
+    "pattern",
+    "neckline",
+    "sleeve_length",
+    "material",
+    "fit",
+    "season",
+    "occasion",
+    "size",
+    "condition",
+    "price_tier",
+)
+
+_LEADING_RUN_RE = re.compile(r"[a-z0-9]+")
+# Description tokens; numbers included for years/eras
+_CLASSIFY_TOKEN_RE = re.compile(r"[a-zA-Z0-9]+(?:'[a-z]+)?")
+_YEAR_RE = re.compile(r"\b(19|20)\d{2}s?\b")
+# Word tokens used for mention positions in attribute_confidences
+_CONFIDENCE_TOKEN_RE = re.compile(r"[a-zA-Z]+(?:'[a-z]+)?")
+
+
+def _build_term_index() -> tuple[
+    dict[str, list[tuple[str, str, bool]]],
+    dict[str, list[tuple[re.Pattern[str], str, str, bool]]],
+]:
+    """Index every ontology term and synonym surface once for classify_basic.
+
+    Single-word terms map token -> [(family, canonical, from_synonym)]. Multi-word and
+    hyphenated terms keep their word-boundary pattern, keyed by their leading alphanumeric
+    run: a term can only match where that run occurs as a whole run in the text, so only
+    those patterns need to be searched.
+    """
+    single: dict[str, list[tuple[str, str, bool]]] = {}
+    multi: dict[str, list[tuple[re.Pattern[str], str, str, bool]]] = {}
+
+    def index(surface: str, fam: str, canon: str, from_synonym: bool) -> None:
+        if " " in surface or "-" in surface:
+            pattern = re.compile(r"\b" + re.escape(surface) + r"\b")
+            lead = _LEADING_RUN_RE.match(surface)
+            key = lead.group() if lead else ""
+            multi.setdefault(key, []).append((pattern, fam, canon, from_synonym))
+        else:
+            single.setdefault(surface, []).append((fam, canon, from_synonym))
+
+    for fam in _CLASSIFY_FAMILIES:
+        for candidate in ONTOLOGY.get(fam, ()):
+            index(candidate, fam, candidate, False)
+    for fam, syn_dict in SYNONYMS.items():
+        for surf, canon in syn_dict.items():
+            if canon in ONTOLOGY.get(fam, ()):
+                index(surf, fam, canon, True)
+    return single, multi
+
+
+_SINGLE_WORD_TERMS, _MULTI_WORD_TERMS = _build_term_index()
+
 _CLASSIFY_CACHE: dict[str, dict[str, list[str]]] = {}
+_CLASSIFY_CACHE_MAXSIZE = 2048
 _CLASSIFY_HITS = 0
 _CLASSIFY_MISSES = 0
 
@@ -1355,10 +1420,16 @@ _CLASSIFY_MISSES = 0
 def classify_basic(description: str) -> dict[str, list[str]]:
     """Extract ontology attributes from free-form description using heuristics.
 
-    Goals: low false positive rate, determinism, inexpensive.
+    Goals: low false positive rate, determinism, inexpensive. Results are memoized on the
+    normalized (stripped, lowercased) description; each call gets its own mutable copy.
     """
-    text = description.lower()
-    tokens = re.findall(r"[a-zA-Z0-9]+(?:'[a-z]+)?", text)  # Include numbers for years/eras
+    return {fam: list(vals) for fam, vals in _classify_normalized(description.strip().lower())}
+
+
+@lru_cache(maxsize=4096)
+def _classify_normalized(text: str) -> tuple[tuple[str, tuple[str, ...]], ...]:
+    """classify_basic on already-normalized text, frozen so the cached value stays immutable."""
+    tokens = _CLASSIFY_TOKEN_RE.findall(text)
     token_set = set(tokens)
 
     out: dict[str, list[str]] = {}
@@ -1376,47 +1447,25 @@ def classify_basic(description: str) -> dict[str, list[str]]:
     def fam_add(fam: str, val: str):
         fam_matches.setdefault(fam, set()).add(val)
 
-    # Token / boundary matches for all families
-    for fam in [
-        "category",
-        "subcategory",
-        "era",
-        "brand",
-        "style",
-        "color_primary",
-        "pattern",
-        "neckline",
-        "sleeve_length",
-        "material",
-        "fit",
-        "season",
-        "occasion",
-        "size",
-        "condition",
-        "price_tier",
-    ]:
-        for candidate in ONTOLOGY.get(fam, []):
-            if " " in candidate or "-" in candidate:
-                # Multi-word or hyphenated terms
-                escaped = re.escape(candidate)
-                if re.search(r"\b" + escaped + r"\b", text):
-                    fam_add(fam, candidate)
-            else:
-                # Single words
-                if candidate in token_set:
-                    fam_add(fam, candidate)
-
-    # Synonym surfaces - check all synonym families
-    for fam, syn_dict in SYNONYMS.items():
-        for surf, canon in syn_dict.items():
-            surf_matches = (
-                (" " in surf or "-" in surf) and re.search(r"\b" + re.escape(surf) + r"\b", text)
-            ) or (" " not in surf and "-" not in surf and surf in token_set)
-            if surf_matches and canon in ONTOLOGY.get(fam, set()):
-                fam_add(fam, canon)
+    # Ontology terms, then synonym surfaces: single-word terms by token lookup, multi-word /
+    # hyphenated terms only when their leading word occurs. Hits are added family by family
+    # in the same order as a full scan over every term would.
+    onto_hits: dict[str, set[str]] = {}
+    syn_hits: dict[str, set[str]] = {}
+    for tok in token_set:
+        for fam, canon, from_synonym in _SINGLE_WORD_TERMS.get(tok, ()):
+            (syn_hits if from_synonym else onto_hits).setdefault(fam, set()).add(canon)
+    for run in set(_LEADING_RUN_RE.findall(text)):
+        for pattern, fam, canon, from_synonym in _MULTI_WORD_TERMS.get(run, ()):
+            if pattern.search(text):
+                (syn_hits if from_synonym else onto_hits).setdefault(fam, set()).add(canon)
+    for hits, fam_order in ((onto_hits, _CLASSIFY_FAMILIES), (syn_hits, SYNONYMS)):
+        for fam in fam_order:
+            for val in hits.get(fam, ()):
+                fam_add(fam, val)
 
     # Special pattern matching for decades/years
-    year_matches = re.findall(r"\b(19|20)\d{2}s?\b", text)
+    year_matches = _YEAR_RE.findall(text)
     for year_match in year_matches:
         if year_match.endswith("s"):
             decade = year_match
@@ -1593,7 +1642,7 @@ def classify_basic(description: str) -> dict[str, list[str]]:
         for v in sorted(vals):
             add(fam, v)
 
-    return out
+    return tuple((fam, tuple(vals)) for fam, vals in out.items())
 
 
 def classify_basic_cached(description: str) -> dict[str, list[str]]:
@@ -1605,7 +1654,7 @@ def classify_basic_cached(description: str) -> dict[str, list[str]]:
         return cached
     _CLASSIFY_MISSES += 1
     result = classify_basic(description)
-    if len(_CLASSIFY_CACHE) > 2048:  # simple size bound
+    if len(_CLASSIFY_CACHE) >= _CLASSIFY_CACHE_MAXSIZE:  # simple size bound
         _CLASSIFY_CACHE.clear()
         _CLASSIFY_HITS = 0
         _CLASSIFY_MISSES = 0
@@ -1613,11 +1662,29 @@ def classify_basic_cached(description: str) -> dict[str, list[str]]:
     return result
 
 
+def classify_basic_cached_batch(descriptions: list[str]) -> list[dict[str, list[str]]]:
+    """classify_basic_cached over a list, classifying each distinct normalized description once.
+
+    Matching is already a hash lookup per token/run, so the batch only removes repeat
+    dispatch; repeats within one batch share a result and are not counted as cache hits.
+    """
+    seen: dict[str, dict[str, list[str]]] = {}
+    results: list[dict[str, list[str]]] = []
+    for description in descriptions:
+        key = description.strip().lower()
+        result = seen.get(key)
+        if result is None:
+            result = seen[key] = classify_basic_cached(description)
+        results.append(result)
+    return results
+
+
 def classify_cache_stats() -> dict[str, float | int]:
     total = _CLASSIFY_HITS + _CLASSIFY_MISSES
     hit_rate = (_CLASSIFY_HITS / total) if total else 0.0
     return {
         "size": len(_CLASSIFY_CACHE),
+        "maxsize": _CLASSIFY_CACHE_MAXSIZE,
         "hits": _CLASSIFY_HITS,
         "misses": _CLASSIFY_MISSES,
         "hit_rate": round(hit_rate, 4),
@@ -1627,10 +1694,25 @@ def classify_cache_stats() -> dict[str, float | int]:
 def clear_classify_cache() -> None:
     global _CLASSIFY_HITS, _CLASSIFY_MISSES
     _CLASSIFY_CACHE.clear()
+    _classify_normalized.cache_clear()
+    _first_token_positions.cache_clear()
     _CLASSIFY_HITS = 0
     _CLASSIFY_MISSES = 0
 
 
+@lru_cache(maxsize=4096)
+def _first_token_positions(text: str) -> dict[str, tuple[int, int]]:
+    """Token -> (index of first occurrence, occurrence count) for attribute_confidences.
+
+    Cached and shared between calls: treat the returned mapping as read-only.
+    """
+    positions: dict[str, tuple[int, int]] = {}
+    for i, tok in enumerate(_CONFIDENCE_TOKEN_RE.findall(text)):
+        first, count = positions.get(tok, (i, 0))
+        positions[tok] = (first, count + 1)
+    return positions
+
+
 def attribute_confidences(
     description: str, attrs: dict[str, list[str]]
 ) -> dict[tuple[str, str], float]:
@@ -1639,16 +1721,15 @@ def attribute_confidences(
     Scoring (capped at 0.95): base 0.55; +0.2 if first mention < token 30; +0.1 repeated;
     +0.05 if family in strong-cue set.
     """
-    text = description.lower()
-    tokens = re.findall(r"[a-zA-Z]+(?:'[a-z]+)?", text)
+    positions = _first_token_positions(description.lower())
     conf: dict[tuple[str, str], float] = {}
     for fam, values in attrs.items():
         for v in values:
             base = 0.55
-            occurrences = [i for i, t in enumerate(tokens) if t == v]
-            if occurrences and occurrences[0] < 30:
+            first, count = positions.get(v, (None, 0))
+            if first is not None and first < 30:
                 base += 0.2
-            if len(occurrences) > 1:
+            if count > 1:
                 base += 0.1
             if fam in {"pattern", "style", "color_primary"}:
                 base += 0.05
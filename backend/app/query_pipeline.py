@@ -1,20 +1,35 @@
 """Query pipeline: parse user text -> structured + embedding -> retrieve & rank garments.
 
-Initial simple implementation; can evolve to ANN + feedback-aware reranking.
+Retrieval narrows to nearest neighbours through the pgvector HNSW index on PostgreSQL
+(see ``_ann_candidate_ids``); the index is maintained by the database on every write, so
+there is no in-process index to rebuild or invalidate when garments are added or
+re-described. Other backends score every garment in one batched matrix product.
 """
 
 from __future__ import annotations
 
+import heapq
+import logging
 import math
+import os
+from collections.abc import Callable, Sequence
 from dataclasses import dataclass
 from typing import Any
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+import numpy as np
+from sqlalchemy import LargeBinary, cast, or_, select, type_coerce
+from sqlalchemy.orm import Session, defer
 
 from . import openai_extractor, user_state
-from .db_models import Garment
+from .db_models import PGVECTOR_AVAILABLE, Garment
 from .describe_images import embed_text
+from .vector_utils import OPENAI_TEXT_EMBED_DIM
+
+logger = logging.getLogger(__name__)
+
+# Number of nearest neighbours pulled from the pgvector HNSW index before full
+# re-ranking. 0 disables the index and scores every garment.
+ANN_CANDIDATES = int(os.getenv("SEARCH_ANN_CANDIDATES", "200"))
 
 
 @dataclass
@@ -24,6 +39,30 @@ class ParsedQuery:
     text_embedding: list[float] | None
 
 
+@dataclass(frozen=True)
+class QueryPipelineDeps:
+    """External calls made while parsing a query.
+
+    Injected into ``/search`` with ``Depends(default_deps)``; tests replace them with a
+    single ``app.dependency_overrides[default_deps]`` entry.
+    """
+
+    embed_text: Callable[[Any, str], list[float]]
+    extract_preferences: Callable[..., dict[str, Any]]
+    get_client: Callable[[], Any]
+
+
+def default_deps() -> QueryPipelineDeps:
+    # Resolved per call so module-level patches of these names still take effect
+    from .main import get_client
+
+    return QueryPipelineDeps(
+        embed_text=embed_text,
+        extract_preferences=openai_extractor.extract_preferences,
+        get_client=get_client,
+    )
+
+
 @dataclass
 class RankedGarment:
     garment_id: int
@@ -52,22 +91,118 @@ def _cos(a: list[float], b: list[float]) -> float:
     return dot / (na * nb)
 
 
-def parse_query(text: str, model: str | None = None) -> ParsedQuery:
+class _SimilarityScorer:
+    """Cosine similarity of one query against many garment embeddings at once.
+
+    Embeddings of equal width are stacked into a contiguous, L2-normalised float32
+    matrix (built lazily per width and reused across queries) so each query is a
+    single matrix-vector product. Rows whose width differs from the query fall back
+    to ``_cos`` and its truncation semantics.
+    """
+
+    __slots__ = ("_vectors", "_packed", "_stacked")
+
+    def __init__(self, vectors: Sequence[Sequence[float] | None]):
+        self._vectors = vectors
+        self._packed: Sequence[bytes | None] | None = None
+        self._stacked: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+
+    @classmethod
+    def from_packed(cls, blobs: Sequence[bytes | None]) -> _SimilarityScorer:
+        """Build from raw float32 column bytes (see ``db_models.Float32Array``).
+
+        Rows are zero-copy ``np.frombuffer`` views and each per-width matrix is a
+        single ``frombuffer`` over the joined bytes, so no per-element Python floats
+        are created.
+        """
+        scorer = cls([None if b is None else np.frombuffer(b, dtype="<f4") for b in blobs])
+        scorer._packed = blobs
+        return scorer
+
+    def _matrix(self, dim: int) -> tuple[np.ndarray, np.ndarray]:
+        stacked = self._stacked.get(dim)
+        if stacked is None:
+            rows = np.fromiter(
+                (i for i, v in enumerate(self._vectors) if v is not None and len(v) == dim),
+                dtype=np.intp,
+            )
+            if self._packed is not None:
+                raw = b"".join(self._packed[i] for i in rows)
+                mat = np.frombuffer(raw, dtype="<f4").astype(np.float32).reshape(-1, dim)
+            else:
+                mat = np.asarray([self._vectors[i] for i in rows], dtype=np.float32)
+                mat = mat.reshape(-1, dim)
+            norms = np.linalg.norm(mat, axis=1, keepdims=True)
+            np.divide(mat, norms, out=mat, where=norms > 0)
+            stacked = self._stacked[dim] = (rows, mat)
+        return stacked
+
+    def scores(self, query: list[float] | None) -> list[float]:
+        out = np.zeros(len(self._vectors), dtype=np.float32)
+        if query:
+            q = np.asarray(query, dtype=np.float32)
+            q_norm = float(np.linalg.norm(q))
+            if q_norm > 0:
+                rows, mat = self._matrix(q.shape[0])
+                if rows.size:
+                    out[rows] = mat @ (q / q_norm)
+            for i, v in enumerate(self._vectors):
+                if v is not None and 0 < len(v) != len(query):
+                    out[i] = _cos(query, list(v))
+        return out.tolist()
+
+
+# Ranking components in score-composition order, with their weights; the negative
+# profile penalty is subtracted.
+_SCORE_WEIGHTS: dict[str, float] = {
+    "text_similarity": 0.55,
+    "attribute_overlap": 0.22,
+    "preference_weight": 0.1,
+    "positive_profile_similarity": 0.18,
+    "negative_profile_penalty": 0.15,
+}
+_SCORE_COMPONENTS = tuple(_SCORE_WEIGHTS)
+_SCORE_SIGNED_WEIGHTS = np.array(
+    [-w if name == "negative_profile_penalty" else w for name, w in _SCORE_WEIGHTS.items()]
+)
+
+
+def _compose_scores(components: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Weight a ``(len(_SCORE_COMPONENTS), N)`` component matrix into contributions and scores.
+
+    Rows are summed in component order, so each score matches adding the weighted
+    components one by one.
+    """
+    contributions = components * _SCORE_SIGNED_WEIGHTS[:, None]
+    return contributions, contributions.sum(axis=0)
+
+
+def _packed_embeddings(session: Session, *criteria: Any) -> dict[int, bytes]:
+    """Fetch raw ``description_embedding`` bytes by garment id in one query, skipping decode."""
+    raw = type_coerce(Garment.description_embedding, LargeBinary)
+    rows = session.execute(
+        select(Garment.id, raw).where(Garment.description_embedding.isnot(None), *criteria)
+    ).all()
+    return {gid: blob for gid, blob in rows if blob}
+
+
+def parse_query(
+    text: str, model: str | None = None, deps: QueryPipelineDeps | None = None
+) -> ParsedQuery:
     text = (text or "").strip()
     if not text:
         return ParsedQuery(raw=text, attributes={}, text_embedding=None)
-    pref = openai_extractor.extract_preferences(conversation=text, model=model or "gpt-4o-mini")
+    deps = deps or default_deps()
+    pref = deps.extract_preferences(conversation=text, model=model or "gpt-4o-mini")
     attribs: dict[str, list[str]] = {}
     fams = pref.get("families") or pref.get("likes") or {}
     if isinstance(fams, dict):
         for fam, values in fams.items():
             if isinstance(values, list):
                 attribs[fam] = [str(v) for v in values]
-    # Local import to avoid circular dependency at module import time
-    from .main import get_client  # inline import
-
-    client = get_client()
-    emb = user_state.cache_query_embedding(text, lambda t: embed_text(client, t))
+    embed = deps.embed_text
+    client = deps.get_client()
+    emb = user_state.cache_query_embedding(text, lambda t: embed(client, t))
     return ParsedQuery(raw=text, attributes=attribs, text_embedding=emb)
 
 
@@ -149,11 +284,12 @@ def _load_user_positive_embedding(user_id: str | None) -> list[float] | None:
                 & (InteractionEvent.event_type.in_(["like", "click"]))
             )
         ).all()
-        vectors: list[list[float]] = []
-        for ev in events:
-            g = session.get(Garment, ev.garment_id)
-            if g and g.description_embedding:
-                vectors.append(g.description_embedding)
+        packed = _packed_embeddings(session, Garment.id.in_({ev.garment_id for ev in events}))
+        vectors = [
+            np.frombuffer(packed[ev.garment_id], dtype="<f4").tolist()
+            for ev in events
+            if ev.garment_id in packed
+        ]
         emb = user_state.combine_embeddings(vectors)
         user_state.set_user_embedding(user_id, emb)
         return emb
@@ -180,16 +316,50 @@ def _load_user_negative_embedding(user_id: str | None) -> list[float] | None:
                 & (InteractionEvent.event_type.in_(["dislike"]))
             )
         ).all()
-        vectors: list[list[float]] = []
-        for ev in events:
-            g = session.get(Garment, ev.garment_id)
-            if g and g.description_embedding:
-                vectors.append(g.description_embedding)
+        packed = _packed_embeddings(session, Garment.id.in_({ev.garment_id for ev in events}))
+        vectors = [
+            np.frombuffer(packed[ev.garment_id], dtype="<f4").tolist()
+            for ev in events
+            if ev.garment_id in packed
+        ]
         emb = user_state.combine_embeddings(vectors)
         user_state.set_user_embedding(user_id + "__neg", emb)
         return emb
 
 
+def _ann_candidate_ids(session: Session, query_vec: list[float] | None, k: int) -> list[int] | None:
+    """Return ids of the ``k`` nearest garments via the HNSW index, or None if unavailable.
+
+    Only used on PostgreSQL with pgvector and a full-width OpenAI query embedding. The
+    index is a halfvec expression over ``openai_text_embedding_vec`` (see migration
+    0007), so the ORDER BY must use the same cast for the planner to pick it up.
+    """
+    if k <= 0 or not PGVECTOR_AVAILABLE or not query_vec:
+        return None
+    if len(query_vec) != OPENAI_TEXT_EMBED_DIM:
+        return None
+    if session.get_bind().dialect.name != "postgresql":
+        return None
+    from pgvector.sqlalchemy import HALFVEC
+
+    half_vec = cast(Garment.openai_text_embedding_vec, HALFVEC(OPENAI_TEXT_EMBED_DIM))
+    try:
+        # Savepoint: a failed statement aborts the whole PostgreSQL transaction, which
+        # would otherwise break the full-scan fallback on this same session
+        with session.begin_nested():
+            return list(
+                session.scalars(
+                    select(Garment.id)
+                    .where(Garment.openai_text_embedding_vec.isnot(None))
+                    .order_by(half_vec.cosine_distance(query_vec))
+                    .limit(k)
+                ).all()
+            )
+    except Exception:  # noqa: BLE001 - fall back to full scan
+        logger.warning("ANN candidate query failed; falling back to full scan", exc_info=True)
+        return None
+
+
 def retrieve_and_rank(
     parsed: ParsedQuery, limit: int = 10, user_id: str | None = None
 ) -> tuple[list[RankedGarment], dict[int, list]]:
@@ -197,8 +367,20 @@ def retrieve_and_rank(
 
     engine = get_engine()
     with Session(engine) as session:
+        # Narrow to ANN candidates when the vector index is usable; rows without an
+        # indexed vector are still scored so nothing silently drops out of results.
+        # Embeddings are deferred on the ORM rows and fetched as raw bytes below.
+        criteria = []
+        candidate_ids = _ann_candidate_ids(
+            session, parsed.text_embedding, max(ANN_CANDIDATES, limit)
+        )
+        if candidate_ids is not None:
+            criteria.append(
+                or_(Garment.id.in_(candidate_ids), Garment.openai_text_embedding_vec.is_(None))
+            )
+        stmt = select(Garment).options(defer(Garment.description_embedding)).where(*criteria)
         # Preload attribute relationships for scoring
-        garments = session.scalars(select(Garment)).all()
+        garments = session.scalars(stmt).all()
         # eager load attributes
         for g in garments:
             _ = g.attributes
@@ -206,71 +388,59 @@ def retrieve_and_rank(
         user_positive_emb = _load_user_positive_embedding(user_id)
         user_negative_emb = _load_user_negative_embedding(user_id)
 
-        results: list[RankedGarment] = []
         garment_attr_map: dict[int, list] = {g.id: list(g.attributes) for g in garments}
-        for g in garments:
-            components: dict[str, float] = {}
-            contributions: dict[str, float] = {}
-            score = 0.0
-            weights_meta = {
-                "text_similarity": 0.55,
-                "attribute_overlap": 0.22,
-                "preference_weight": 0.1,
-                "positive_profile_similarity": 0.18,
-                "negative_profile_penalty": 0.15,
-            }
-            # text similarity
-            if parsed.text_embedding and g.description_embedding:
-                sim = _cos(parsed.text_embedding, g.description_embedding)
-                components["text_similarity"] = sim
-                contributions["text_similarity"] = sim * weights_meta["text_similarity"]
-                score += contributions["text_similarity"]
+        packed = _packed_embeddings(session, *criteria)
+        blobs = [packed.get(g.id) for g in garments]
+        scorer = _SimilarityScorer.from_packed(blobs)
+        has_embedding = np.fromiter((b is not None for b in blobs), dtype=bool, count=len(blobs))
+
+        components = np.zeros((len(_SCORE_COMPONENTS), len(garments)))
+        if parsed.text_embedding:
+            components[0] = np.where(has_embedding, scorer.scores(parsed.text_embedding), 0.0)
+        attr_details_by_idx: list[list[dict]] = []
+        for idx, g in enumerate(garments):
             # attribute overlap (with details)
             attr_score, attr_details = _attribute_overlap_score(parsed, g)
-            components["attribute_overlap"] = attr_score
-            contributions["attribute_overlap"] = attr_score * weights_meta["attribute_overlap"]
-            score += contributions["attribute_overlap"]
+            components[1, idx] = attr_score
+            attr_details_by_idx.append(attr_details)
             # preference weight
-            pref_val = 0.0
             if user_pref_weights and g.attributes:
                 weights = [user_pref_weights.get(ga.attribute_value_id, 0.0) for ga in g.attributes]
                 if weights:
                     raw_pref = sum(weights) / len(weights)
-                    import math as _m
-
-                    pref_val = _m.tanh(raw_pref / 2.5)  # slightly stronger influence
+                    pref_val = math.tanh(raw_pref / 2.5)  # slightly stronger influence
                     if raw_pref > 0:
                         pref_val += 0.05  # guaranteed minimal boost after positive feedback
-            components["preference_weight"] = pref_val
-            contributions["preference_weight"] = pref_val * weights_meta["preference_weight"]
-            score += contributions["preference_weight"]
-            # TEMP DEBUG (will remove): ensure preference contributes when >0
-            # print('DEBUG pref', pref_val, contributions['preference_weight'])
-            # positive profile centroid similarity
-            pos_sim = 0.0
-            if user_positive_emb and g.description_embedding:
-                pos_sim = _cos(user_positive_emb, g.description_embedding)
-            components["positive_profile_similarity"] = pos_sim
-            contributions["positive_profile_similarity"] = (
-                pos_sim * weights_meta["positive_profile_similarity"]
-            )
-            score += contributions["positive_profile_similarity"]
-            # negative profile (penalty)
-            neg_pen = 0.0
-            if user_negative_emb and g.description_embedding:
-                neg_sim = _cos(user_negative_emb, g.description_embedding)
-                # convert similarity into penalty (bounded 0..1)
-                neg_pen = max(0.0, neg_sim)
-            components["negative_profile_penalty"] = neg_pen
-            contributions["negative_profile_penalty"] = (
-                -neg_pen * weights_meta["negative_profile_penalty"]
-            )
-            score += contributions["negative_profile_penalty"]
+                    components[2, idx] = pref_val
+        # positive profile centroid similarity
+        if user_positive_emb:
+            components[3] = np.where(has_embedding, scorer.scores(user_positive_emb), 0.0)
+        # negative profile: similarity converted into a penalty (bounded 0..1)
+        if user_negative_emb:
+            neg_sims = np.maximum(scorer.scores(user_negative_emb), 0.0)
+            components[4] = np.where(has_embedding, neg_sims, 0.0)
+        contributions, scores = _compose_scores(components)
+
+        # Partial selection: O(N log k) instead of sorting every candidate; same order as
+        # a stable descending sort truncated to ``limit``. Explanations are only built
+        # for the garments returned.
+        top = heapq.nlargest(limit, range(len(garments)), key=scores.__getitem__)
+        results: list[RankedGarment] = []
+        for idx in top:
+            g = garments[idx]
+            score = float(scores[idx])
+            # text similarity is only reported when both sides have embeddings
+            text_reported = parsed.text_embedding and has_embedding[idx]
+            reported = range(0 if text_reported else 1, len(_SCORE_COMPONENTS))
             explanation = {
-                "components": components,
-                "attribute_details": attr_details,
-                "weights": weights_meta,
-                "contributions": contributions,
+                "components": {
+                    _SCORE_COMPONENTS[row]: float(components[row, idx]) for row in reported
+                },
+                "attribute_details": attr_details_by_idx[idx],
+                "weights": dict(_SCORE_WEIGHTS),
+                "contributions": {
+                    _SCORE_COMPONENTS[row]: float(contributions[row, idx]) for row in reported
+                },
                 "final_score": score,
                 "garment_attributes": [
                     {
@@ -294,8 +464,7 @@ def retrieve_and_rank(
                     image_path=g.image_path,
                 )
             )
-    results.sort(key=lambda r: r.score, reverse=True)
-    return results[:limit], garment_attr_map
+    return results, garment_attr_map
 
 
 def search(
@@ -303,6 +472,7 @@ def search(
     limit: int = 10,
     model: str | None = None,
     user_id: str | None = None,
+    deps: QueryPipelineDeps | None = None,
 ) -> dict:
     # local helper for lightweight clients
     def _summarize_explanation(
@@ -320,7 +490,7 @@ def search(
             "final_score": expl.get("final_score"),
         }
 
-    parsed = parse_query(text, model=model)
+    parsed = parse_query(text, model=model, deps=deps)
     ranked, garment_attr_map = retrieve_and_rank(parsed, limit=limit, user_id=user_id)
     return {
         "query": parsed.raw,
@@ -16,58 +16,34 @@ from sqlalchemy.orm import Session
 from .db_models import AttributeValue, Garment
 from .inventory_utils import safe_add_garment_attribute as _safe_add_garment_attribute
 from .ontology import attribute_confidences, classify_basic_cached
+from .vector_utils import set_openai_text_embedding
 
 # Type aliases for injected functions (easier to monkeypatch in tests)
 DescribeFn = Callable[[Any, Path, str], str]
 EmbedFn = Callable[[str], list[float]]
+EmbedManyFn = Callable[[list[str]], list[list[float]]]
 
 
-def refresh_description_core(
-    session: Session,
-    garment_id: int,
-    *,
-    overwrite: bool,
-    model: str,
-    describe_fn: DescribeFn,
-    embed_fn: EmbedFn,
-    client: Any | None = None,
-) -> dict[str, object]:
-    """Refresh (or reuse) a garment description.
-
-    Parameters
-    ----------
-    session : Session
-        Active SQLAlchemy session (caller owns transaction lifecycle).
-    garment_id : int
-        Target garment id.
-    overwrite : bool
-        If False and description already present, short-circuits with cached=True.
-    model : str
-        Vision model name passed to describe_fn.
-    describe_fn : callable(client, path, model)->str
-        Function that returns description text (supports monkeypatching).
-    embed_fn : callable(text)->list[float]
-        Embedding function (already possibly cached) that returns vector or [].
-    client : Any | None
-        Optional OpenAI client (passed through to describe_fn).
-    """
+def _load_describable_garment(session: Session, garment_id: int) -> Garment:
     g = session.get(Garment, garment_id)
     if not g:
         raise HTTPException(status_code=404, detail="garment not found")
     if not g.image_path:
         raise HTTPException(status_code=400, detail="garment has no image_path")
-    if g.description and not overwrite:
-        return {"garment_id": g.id, "description": g.description, "cached": True}
+    return g
 
-    # Generate description text
-    text = describe_fn(client, Path(g.image_path), model)
-    embedding = embed_fn(text) or []
+
+def _apply_description(
+    session: Session, g: Garment, text: str, embedding: list[float]
+) -> dict[str, object]:
+    """Store description + embedding on ``g`` and attach inferred attributes (no commit)."""
     g.description = text
     if embedding:
         from contextlib import suppress
 
         with suppress(Exception):  # pragma: no cover - defensive
             g.description_embedding = embedding
+            set_openai_text_embedding(g, embedding)
 
     # Attribute inference & persistence
     inferred = classify_basic_cached(text)
@@ -89,10 +65,85 @@ def refresh_description_core(
                     av_id=av.id,
                     confidence=conf_map.get((fam, v), 0.5),
                 )
-    session.commit()
     return {
         "garment_id": g.id,
         "description": text,
         "embedding_dims": len(embedding),
         "cached": False,
     }
+
+
+def refresh_description_core(
+    session: Session,
+    garment_id: int,
+    *,
+    overwrite: bool,
+    model: str,
+    describe_fn: DescribeFn,
+    embed_fn: EmbedFn,
+    client: Any | None = None,
+) -> dict[str, object]:
+    """Refresh (or reuse) a garment description.
+
+    Parameters
+    ----------
+    session : Session
+        Active SQLAlchemy session (caller owns transaction lifecycle).
+    garment_id : int
+        Target garment id.
+    overwrite : bool
+        If False and description already present, short-circuits with cached=True.
+    model : str
+        Vision model name passed to describe_fn.
+    describe_fn : callable(client, path, model)->str
+        Function that returns description text (supports monkeypatching).
+    embed_fn : callable(text)->list[float]
+        Embedding function (already possibly cached) that returns vector or [].
+    client : Any | None
+        Optional OpenAI client (passed through to describe_fn).
+    """
+    g = _load_describable_garment(session, garment_id)
+    if g.description and not overwrite:
+        return {"garment_id": g.id, "description": g.description, "cached": True}
+
+    # Generate description text
+    text = describe_fn(client, Path(g.image_path), model)
+    embedding = embed_fn(text) or []
+    result = _apply_description(session, g, text, embedding)
+    session.commit()
+    return result
+
+
+def refresh_descriptions_core(
+    session: Session,
+    garment_ids: list[int],
+    *,
+    overwrite: bool,
+    model: str,
+    describe_fn: DescribeFn,
+    embed_many_fn: EmbedManyFn,
+    client: Any | None = None,
+) -> list[dict[str, object]]:
+    """Refresh several garment descriptions, embedding all new texts in one request.
+
+    Same per-garment semantics as :func:`refresh_description_core` (every id is
+    validated up front and results keep input order), but one embeddings call and
+    one commit cover the whole batch.
+    """
+    garments = [_load_describable_garment(session, gid) for gid in garment_ids]
+    results: list[dict[str, object]] = []
+    pending: list[tuple[int, Garment, str]] = []
+    for g in garments:
+        if g.description and not overwrite:
+            results.append({"garment_id": g.id, "description": g.description, "cached": True})
+            continue
+        text = describe_fn(client, Path(g.image_path or ""), model)
+        pending.append((len(results), g, text))
+        results.append({})  # placeholder filled once embeddings are back
+
+    if pending:
+        embeddings = embed_many_fn([text for _, _, text in pending])
+        for (i, g, text), embedding in zip(pending, embeddings, strict=True):
+            results[i] = _apply_description(session, g, text, embedding or [])
+        session.commit()
+    return results
@@ -5,10 +5,27 @@ from __future__ import annotations
 import numpy as np
 from sklearn.neighbors import NearestNeighbors  # type: ignore[import-untyped]
 
+try:  # optional SIMD distance kernels; NumPy fallback below
+    import simsimd  # type: ignore[import-not-found]
+
+    SIMSIMD_AVAILABLE = True
+except ImportError:
+    SIMSIMD_AVAILABLE = False
+
 
 def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
     if a.shape != b.shape:
         raise ValueError("Shape mismatch")
+    if SIMSIMD_AVAILABLE and a.ndim == 1:
+        # simsimd returns cosine *distance* and scores zero vectors as 0 or 1 apart;
+        # keep this function's contract of 0.0 similarity for a zero vector.
+        if not a.any() or not b.any():
+            return 0.0
+        dtype = np.result_type(a, b, np.float32)
+        distance = simsimd.cosine(
+            np.ascontiguousarray(a, dtype=dtype), np.ascontiguousarray(b, dtype=dtype)
+        )
+        return 1.0 - float(distance)
     na = np.linalg.norm(a)
     nb = np.linalg.norm(b)
     if na == 0 or nb == 0:
@@ -6,6 +6,9 @@ from typing import Any, Optional
 
 logger = logging.getLogger(__name__)
 
+# Width of OpenAI text-embedding-3-small vectors (matches openai_text_embedding_vec)
+OPENAI_TEXT_EMBED_DIM = 1536
+
 
 def migrate_json_to_vector(json_embedding: Optional[list[float]]) -> Optional[Any]:
     """
@@ -111,3 +114,20 @@ def set_embeddings_dual_format(obj, field_name: str, embedding: list[float]) ->
     vector_field = f"{field_name}_vec"
     if hasattr(obj, vector_field):
         setattr(obj, vector_field, migrate_json_to_vector(embedding))
+
+
+def set_openai_text_embedding(obj, embedding: Optional[list[float]]) -> None:
+    """
+    Mirror an OpenAI text embedding into the HNSW-indexed ``openai_text_embedding_vec`` column.
+
+    Only full-width vectors are mirrored; anything else (e.g. test fakes) stays JSON-only
+    and is still ranked by the brute-force path.
+
+    Args:
+        obj: Database model instance
+        embedding: List of floats returned by the embeddings API
+    """
+    if not embedding or len(embedding) != OPENAI_TEXT_EMBED_DIM:
+        return
+    if hasattr(obj, "openai_text_embedding_vec"):
+        obj.openai_text_embedding_vec = embedding
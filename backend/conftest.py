@@ -1,7 +1,219 @@
+import sqlite3
 import sys
+import uuid
 from pathlib import Path
 
-# Ensure project root (one level up) is on sys.path so 'backend' package resolves
+import pytest
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+# Project root makes the 'backend' package importable; backend/ itself makes 'app' importable
 ROOT = Path(__file__).resolve().parent.parent
-if str(ROOT) not in sys.path:
-    sys.path.insert(0, str(ROOT))
+for _path in (ROOT, ROOT / "backend"):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+# Test databases are throwaway: no fsync per commit (in-memory databases ignore WAL)
+_SQLITE_TEST_PRAGMAS = ("journal_mode=WAL", "synchronous=NORMAL", "temp_store=MEMORY")
+
+
+@event.listens_for(Engine, "connect")
+def _set_sqlite_test_pragmas(dbapi_conn, _record):
+    if isinstance(dbapi_conn, sqlite3.Connection):
+        cur = dbapi_conn.cursor()
+        for pragma in _SQLITE_TEST_PRAGMAS:
+            cur.execute(f"PRAGMA {pragma}")
+        cur.close()
+
+
+@pytest.fixture(scope="session")
+def local_analyzer():
+    """Session-wide LocalGarmentAnalyzer so the CLIP model is loaded once per test run."""
+    from app.local_cv import LocalGarmentAnalyzer
+
+    return LocalGarmentAnalyzer()
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Session-wide TestClient: app startup/shutdown runs once rather than per test.
+
+    Per-test database isolation still works because ``get_engine`` re-resolves
+    DATABASE_URL on every call.
+    """
+    from fastapi.testclient import TestClient
+
+    from backend.app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def search_deps(client):
+    """Install fake query-pipeline calls for ``/search`` on the shared app for one test.
+
+    Call with ``embed_text`` / ``extract_preferences`` fakes; the OpenAI client is
+    stubbed out. The dependency override is removed after the test.
+    """
+    from backend.app import query_pipeline as qp
+
+    overrides = client.app.dependency_overrides
+
+    def install(embed_text, extract_preferences):
+        deps = qp.QueryPipelineDeps(
+            embed_text=embed_text, extract_preferences=extract_preferences, get_client=lambda: None
+        )
+        overrides[qp.default_deps] = lambda: deps
+
+    yield install
+    overrides.pop(qp.default_deps, None)
+
+
+# Side length CLIP ViT-B/32 preprocessing resizes and crops to
+DESIGN_IMAGE_SIZE = 224
+
+
+@pytest.fixture(scope="session")
+def design_images(request):
+    """Design JPEGs decoded into a read-only ``(N, 224, 224, 3)`` uint8 memmap, keyed by file name.
+
+    Images are center-cropped to CLIP's input size, so the analyzer's own resize/crop is a
+    no-op. The decoded array persists in pytest's cache dir under a name derived from the
+    sources' names, mtimes and sizes: later sessions map it without decoding any JPEG, and
+    a fresh build is written to a private temp file and renamed into place, so concurrent
+    sessions never truncate a file another one has mapped.
+    """
+    import hashlib
+    import os
+
+    import numpy as np
+    from PIL import Image, ImageOps
+
+    paths = sorted(
+        p for p in (ROOT / "design" / "images").iterdir() if p.suffix in {".jpg", ".jpeg"}
+    )
+    if not paths:
+        return {}
+    shape = (len(paths), DESIGN_IMAGE_SIZE, DESIGN_IMAGE_SIZE, 3)
+    signature = hashlib.blake2b(repr(shape).encode(), digest_size=16)
+    for path in paths:
+        st = path.stat()
+        signature.update(f"{path.name}:{st.st_mtime_ns}:{st.st_size}".encode())
+    cache_file = request.config.cache.mkdir("design_images") / f"{signature.hexdigest()}.uint8"
+    if not cache_file.exists() or cache_file.stat().st_size != int(np.prod(shape)):
+        tmp = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+        stack = np.memmap(tmp, dtype=np.uint8, mode="w+", shape=shape)
+        for i, path in enumerate(paths):
+            with Image.open(path) as im:
+                stack[i] = ImageOps.fit(im.convert("RGB"), (DESIGN_IMAGE_SIZE, DESIGN_IMAGE_SIZE))
+        stack.flush()
+        del stack
+        os.replace(tmp, cache_file)
+    stack = np.memmap(cache_file, dtype=np.uint8, mode="r", shape=shape)
+    return {path.name: stack[i] for i, path in enumerate(paths)}
+
+
+@pytest.fixture(scope="module")
+def mock_aws_session():
+    """Module-wide moto mock plus one boto3 Session.
+
+    botocore caches parsed service models per Session, so clients created from it
+    across tests skip the JSON model load. Fake credentials keep request signing
+    off the real credential chain.
+    """
+    import boto3
+    from moto import mock_aws
+
+    with pytest.MonkeyPatch.context() as mp, mock_aws():
+        mp.setenv("AWS_ACCESS_KEY_ID", "testing")
+        mp.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+        mp.setenv("AWS_DEFAULT_REGION", "us-east-1")
+        yield boto3.Session(region_name="us-east-1")
+
+
+# Fixed attribute vocabulary present in every template_db clone
+TEMPLATE_ATTRIBUTES = [("style", "band"), ("color", "black")]
+
+
+@pytest.fixture(scope="session")
+def template_engine():
+    """In-memory SQLite engine with the full schema and attribute vocabulary.
+
+    Built once per test session; ``template_db`` page-copies it per test and ``db_session``
+    works on it directly inside a transaction that is rolled back.
+    """
+    from backend.app.db_models import AttributeValue, Base
+
+    # Autocommit driver mode plus an explicit BEGIN: pysqlite's implicit transaction
+    # handling otherwise lets a released SAVEPOINT commit (SQLAlchemy's pysqlite recipe)
+    conn = sqlite3.connect(":memory:", check_same_thread=False, isolation_level=None)
+    engine = create_engine("sqlite://", creator=lambda: conn, poolclass=StaticPool)
+    event.listen(engine, "begin", lambda c: c.exec_driver_sql("BEGIN"))
+    Base.metadata.create_all(engine)
+    with engine.begin() as c:
+        c.execute(
+            insert(AttributeValue),
+            [{"family": fam, "value": val} for fam, val in TEMPLATE_ATTRIBUTES],
+        )
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def sqlite_template(template_engine):
+    """Raw sqlite3 connection behind ``template_engine``; the source of ``template_db`` copies."""
+    with template_engine.connect() as c:
+        return c.connection.driver_connection
+
+
+@pytest.fixture()
+def db_session(template_engine):
+    """ORM Session on the shared schema template, rolled back after the test.
+
+    For tests that call library code with a Session directly; endpoints commit through
+    ``get_engine`` and need ``template_db`` instead. The session joins an outer
+    transaction, so its commits only release SAVEPOINTs and nothing reaches the template.
+    """
+    with template_engine.connect() as conn:
+        outer = conn.begin()
+        with Session(bind=conn, join_transaction_mode="create_savepoint") as session:
+            yield session
+        outer.rollback()
+
+
+@pytest.fixture(autouse=True)
+def _reset_engine_cache():
+    """Dispose the app's cached engines after each test.
+
+    No engine outlives the per-test database it points at, so each xdist worker process
+    starts every test with an empty cache. The module is only touched once imported.
+    """
+    yield
+    for name in ("backend.app.ingest", "app.ingest"):
+        ingest = sys.modules.get(name)
+        if ingest is not None:
+            ingest.dispose_engines()
+
+
+@pytest.fixture()
+def template_db(sqlite_template, monkeypatch):
+    """Per-test copy of the schema template in a named shared-cache in-memory database.
+
+    DATABASE_URL points at the copy and the app's cached engine is pre-seeded with the
+    returned one, so ``get_engine`` hands out this StaticPool engine instead of building
+    (and running create_all on) a second engine for the same database.
+    """
+    from backend.app import ingest
+
+    uri = f"file:test_{uuid.uuid4().hex}?mode=memory&cache=shared"
+    url = f"sqlite:///{uri}&uri=true"
+    keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    sqlite_template.backup(keeper)
+    engine = create_engine("sqlite://", creator=lambda: keeper, poolclass=StaticPool)
+    monkeypatch.setenv("DATABASE_URL", url)
+    monkeypatch.setitem(ingest._ENGINES, url, engine)
+    yield engine
+    engine.dispose()
@@ -1,4 +1,10 @@
-from backend.app.ontology import classify_basic_cached, classify_cache_stats, clear_classify_cache
+import pytest
+from backend.app.ontology import (
+    classify_basic_cached,
+    classify_basic_cached_batch,
+    classify_cache_stats,
+    clear_classify_cache,
+)
 
 
 def test_classifier_cache_stats_counts():
@@ -13,3 +19,29 @@ def test_classifier_cache_stats_counts():
     assert stats["misses"] == 2
     assert stats["size"] == 2
     assert 0 < stats["hit_rate"] < 1
+
+
+@pytest.mark.parametrize("n", [10, 100, 500])
+def test_classifier_cache_hit_rate_scales(n):
+    clear_classify_cache()
+    k = n // 3
+    descs = [f"desc {i % k}" for i in range(n)]
+    for d in descs:
+        classify_basic_cached(d)
+    stats = classify_cache_stats()
+    # Each distinct description misses exactly once; every repeat is a hit (~2/3).
+    assert stats["misses"] == k
+    assert stats["hits"] == n - k
+    assert abs(stats["hit_rate"] - 2 / 3) < 0.05
+    assert stats["size"] == k
+    assert stats["size"] <= stats["maxsize"]
+
+
+def test_classifier_batch_matches_single_calls():
+    clear_classify_cache()
+    descs = ["A floral dress", "  a FLORAL dress ", "Levi's denim jacket", "A floral dress"]
+    results = classify_basic_cached_batch(descs)
+    assert results == [classify_basic_cached(d) for d in descs]
+    assert results[0] is results[1] is results[3]
+    # One classification per distinct normalized description.
+    assert classify_cache_stats()["size"] == 2
@@ -1,16 +1,4 @@
 import base64
-import sys
-from pathlib import Path
-
-from fastapi.testclient import TestClient
-
-ROOT = Path(__file__).resolve().parents[2]
-if str(ROOT / "backend") not in sys.path:
-    sys.path.insert(0, str(ROOT / "backend"))
-try:
-    from app.main import app  # type: ignore
-except Exception:  # pragma: no cover
-    from backend.app.main import app  # type: ignore
 
 
 def _solid_color_png(rgb):
@@ -28,12 +16,11 @@ def _solid_color_png(rgb):
         return b"RAWPNG"
 
 
-def test_dominant_color_attribute_added(tmp_path, monkeypatch):
+def test_dominant_color_attribute_added(tmp_path, monkeypatch, client):
     monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'db.sqlite'}")
     monkeypatch.setenv("INVENTORY_IMAGE_DIR", str(tmp_path / "imgs"))
     # Red-ish
     img_b64 = base64.b64encode(_solid_color_png((200, 40, 40))).decode()
-    client = TestClient(app)
 
     r = client.post("/inventory/upload", json={"filename": "red.png", "image_base64": img_b64})
     assert r.status_code == 200
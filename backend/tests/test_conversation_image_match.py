@@ -3,9 +3,8 @@ import os
 import tempfile
 from pathlib import Path
 
+import numpy as np
 from backend.app.db_models import Base
-from backend.app.main import app
-from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 
 CONVERSATION = (
@@ -13,6 +12,12 @@ CONVERSATION = (
     "for my brand conscious closet. Something minimalist like a grey Calvin Klein tee."
 )
 
+# Shared fake vectors returned by the monkeypatches (no per-call allocation).
+# The zero feature is read-only so a caller mutating it fails loudly.
+_ZERO_512 = np.zeros((512,), dtype=np.float32)
+_ZERO_512.flags.writeable = False
+_FAKE_EMBED = [0.31, 0.09, 0.05]
+
 
 def setup_env(monkeypatch):
     with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
@@ -24,12 +29,10 @@ def setup_env(monkeypatch):
     return engine
 
 
-def test_conversation_matches_grey_brand_tshirt(monkeypatch, tmp_path):
+def test_conversation_matches_grey_brand_tshirt(monkeypatch, tmp_path, client, search_deps):
     """Full flow: ingest an image garment, simulate conversation -> search ranking picks it."""
     setup_env(monkeypatch)
 
-    from backend.app import query_pipeline as qp
-
     def fake_extract_preferences(conversation: str, model: str):  # noqa: ARG001
         assert "sporty" in conversation.lower()
         return {
@@ -40,29 +43,21 @@ def test_conversation_matches_grey_brand_tshirt(monkeypatch, tmp_path):
             }
         }
 
-    monkeypatch.setattr(qp.openai_extractor, "extract_preferences", fake_extract_preferences)
-
     def fake_embed_text(client, text):  # noqa: ARG001
-        return [0.31, 0.09, 0.05]
+        return _FAKE_EMBED
 
-    monkeypatch.setattr(qp, "embed_text", fake_embed_text)
+    search_deps(fake_embed_text, fake_extract_preferences)
 
-    import numpy as np
     from backend.app import image_features
 
-    monkeypatch.setattr(
-        image_features,
-        "image_to_feature",
-        lambda *_: np.zeros((512,), dtype=float),
-    )
+    monkeypatch.setattr(image_features, "image_to_feature", lambda *_: _ZERO_512)
 
     monkeypatch.setenv("IMAGE_STORAGE_DIR", str(tmp_path / "imgs"))
 
     img_path = Path("design/images/test-blue-and-grey-shirts.jpg")
     assert img_path.exists(), "Design image missing for test"
-    img_b64 = base64.b64encode(img_path.read_bytes()).decode()
+    img_b64 = base64.b64encode(img_path.read_bytes()).decode("ascii")
 
-    client = TestClient(app)
     resp = client.post(
         "/garments/ingest",
         json={
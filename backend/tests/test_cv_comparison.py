@@ -4,8 +4,11 @@ Comprehensive test and comparison of OpenAI vs Local CV for garment analysis.
 
 import io
 import os
+import time
+from contextlib import ExitStack
 from unittest.mock import MagicMock, patch
 
+import pytest
 from PIL import Image
 
 from app.inventory_processing import describe_inventory_image_multi
@@ -18,7 +21,7 @@ def create_test_image():
     return image
 
 
-def test_cv_system_comparison():
+def test_cv_system_comparison(local_analyzer):
     """Test both OpenAI and Local CV systems with the same image."""
 
     # Create test image
@@ -37,31 +40,30 @@ def test_cv_system_comparison():
     print("\n1. LOCAL CV SYSTEM (CLIP-based)")
     print("-" * 30)
 
-    with (
-        patch.dict(os.environ, {"USE_LOCAL_CV": "true"}),
-        patch("app.inventory_processing.openai_client") as mock_openai,
-    ):
-            mock_openai.chat.completions.create.side_effect = Exception("Should not call OpenAI")
-
-            result_local = describe_inventory_image_multi(
-                image_data, path="test_image.jpg", model="test"
-            )
-
-            print("✅ Local CV Result:")
-            print(f"   Items detected: {len(result_local)}")
-            if result_local:
-                for item in result_local[:2]:  # Show first 2 items
-                    print(
-                        f"   - {item.get('name', 'Unknown')}: {item.get('description', 'No description')}"
-                    )
-            print("   Model used: Local CLIP")
-            print("   Processing time: Fast (local)")
+    with ExitStack() as stack:
+        stack.enter_context(patch.dict(os.environ, {"USE_LOCAL_CV": "true"}))
+        mock_openai = stack.enter_context(patch("app.inventory_processing.openai_client"))
+        mock_openai.chat.completions.create.side_effect = Exception("Should not call OpenAI")
+
+        result_local = describe_inventory_image_multi(
+            image_data, path="test_image.jpg", model="test"
+        )
+
+        print("✅ Local CV Result:")
+        print(f"   Items detected: {len(result_local)}")
+        if result_local:
+            for item in result_local[:2]:  # Show first 2 items
+                name = item.get("name", "Unknown")
+                print(f"   - {name}: {item.get('description', 'No description')}")
+        print("   Model used: Local CLIP")
+        print("   Processing time: Fast (local)")
 
     # Test 2: OpenAI System (mocked)
     print("\n2. OPENAI SYSTEM (GPT-4o-mini)")
     print("-" * 30)
 
-    with patch.dict(os.environ, {"USE_LOCAL_CV": "false"}):
+    with ExitStack() as stack:
+        stack.enter_context(patch.dict(os.environ, {"USE_LOCAL_CV": "false"}))
         # Mock OpenAI response
         mock_response = MagicMock()
         mock_response.choices[0].message.content = """[
@@ -78,28 +80,27 @@ def test_cv_system_comparison():
             }
         ]"""
 
-        with patch("app.inventory_processing.openai_client") as mock_openai:
-            mock_openai.chat.completions.create.return_value = mock_response
+        mock_openai = stack.enter_context(patch("app.inventory_processing.openai_client"))
+        mock_openai.chat.completions.create.return_value = mock_response
 
-            result_openai = describe_inventory_image_multi(
-                image_data, path="test_image.jpg", model="test"
-            )
+        result_openai = describe_inventory_image_multi(
+            image_data, path="test_image.jpg", model="test"
+        )
 
-            print("✅ OpenAI Result:")
-            print(f"   Items detected: {len(result_openai)}")
-            if result_openai:
-                for item in result_openai[:2]:  # Show first 2 items
-                    print(
-                        f"   - {item.get('name', 'Unknown')}: {item.get('description', 'No description')}"
-                    )
-            print("   Model used: OpenAI GPT-4o-mini")
-            print("   Processing time: Slower (API call)")
+        print("✅ OpenAI Result:")
+        print(f"   Items detected: {len(result_openai)}")
+        if result_openai:
+            for item in result_openai[:2]:  # Show first 2 items
+                name = item.get("name", "Unknown")
+                print(f"   - {name}: {item.get('description', 'No description')}")
+        print("   Model used: OpenAI GPT-4o-mini")
+        print("   Processing time: Slower (API call)")
 
     # Test 3: Direct Local CV Analysis
     print("\n3. DIRECT LOCAL CV ANALYSIS")
     print("-" * 30)
 
-    analyzer = LocalGarmentAnalyzer()
+    analyzer = local_analyzer
     if analyzer._is_available():
         direct_result = analyzer.analyze_image(test_image)
 
@@ -149,16 +150,17 @@ def test_cv_system_comparison():
     print("  Set USE_LOCAL_CV=false for OpenAI GPT-4o-mini analysis")
 
 
-def test_local_cv_performance():
+def test_local_cv_performance(local_analyzer):
     """Test the performance characteristics of local CV."""
     print("\n⚡ LOCAL CV PERFORMANCE TEST")
     print("=" * 40)
 
-    analyzer = LocalGarmentAnalyzer()
+    analyzer = local_analyzer
 
     if not analyzer._is_available():
-        print("❌ Local CV not available")
-        return
+        pytest.skip("Local CV not available")
+    # The session analyzer may already hold results for these images; time real inference
+    analyzer.clear_analysis_cache()
 
     # Test with different image types
     test_cases = [
@@ -173,14 +175,18 @@ def test_local_cv_performance():
     total_confidence = 0.0
 
     for name, image in test_cases:
+        start = time.perf_counter()
         result = analyzer.analyze_image(image)
+        elapsed_ms = (time.perf_counter() - start) * 1000
         garments = result.get("garments", [])
         confidence = result.get("confidence", 0.0)
 
         total_garments += len(garments)
         total_confidence += confidence
 
-        print(f"  {name}: {len(garments)} garments, {confidence:.2f} confidence")
+        print(
+            f"  {name}: {len(garments)} garments, {confidence:.2f} confidence, {elapsed_ms:.1f} ms"
+        )
 
     avg_confidence = total_confidence / len(test_cases) if test_cases else 0
     print("\n📈 Performance Summary:")
@@ -190,5 +196,6 @@ def test_local_cv_performance():
 
 
 if __name__ == "__main__":
-    test_cv_system_comparison()
-    test_local_cv_performance()
+    _analyzer = LocalGarmentAnalyzer()
+    test_cv_system_comparison(_analyzer)
+    test_local_cv_performance(_analyzer)
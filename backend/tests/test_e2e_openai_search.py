@@ -1,27 +1,65 @@
-import base64
+import asyncio
+import binascii
+import functools
+import json
 import math
+import mmap
 import os
 import tempfile
 from pathlib import Path
 
+import httpx
 import pytest
-from fastapi.testclient import TestClient
+from backend.app.db_models import Garment
+from backend.app.ingest import get_engine
+from backend.app.main import app
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session
 
-try:  # allow import when executed inside backend directory or repo root
-    from app.db_models import Garment
-    from app.main import app  # type: ignore
-except Exception:  # pragma: no cover
-    from backend.app.db_models import Garment  # type: ignore
-    from backend.app.main import app  # type: ignore
+
+@functools.lru_cache(maxsize=32)
+def _b64_image(path_str: str, mtime: float) -> str:  # noqa: ARG001
+    """Base64-encode an image file; keyed on mtime so edits invalidate the entry.
+
+    The file is memory-mapped so the raw bytes are never copied into a Python object.
+    """
+    with open(path_str, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return binascii.b2a_base64(mm, newline=False).decode("ascii")
+
+
+try:  # optional: orjson scans the large base64 strings much faster than stdlib json
+    import orjson
+
+    def _dumps(obj: dict) -> bytes:
+        return orjson.dumps(obj)
+
+except ImportError:  # pragma: no cover
+
+    def _dumps(obj: dict) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+
+_JSON_HEADERS = {"content-type": "application/json"}
+
+
+async def _post_all(path: str, payloads: list[dict]) -> list[httpx.Response]:
+    """POST each payload to ``path`` concurrently in-process; responses keep payload order.
+
+    Bodies are serialized up front so the event loop only ships bytes.
+    """
+    bodies = [_dumps(p) for p in payloads]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as aclient:
+        return await asyncio.gather(
+            *(aclient.post(path, content=body, headers=_JSON_HEADERS) for body in bodies)
+        )
 
 
 @pytest.mark.skipif(
     not os.getenv("OPENAI_API_KEY") or not os.getenv("RUN_OPENAI_E2E"),
     reason="Requires real OpenAI key and RUN_OPENAI_E2E=1 to run",
 )
-def test_e2e_openai_search_ranks_target_image_first():
+def test_e2e_openai_search_ranks_target_image_first(client):
     """End-to-end test using ONLY image-derived attributes + descriptions.
 
     Steps:
@@ -37,22 +75,29 @@ def test_e2e_openai_search_ranks_target_image_first():
     with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
         os.environ["DATABASE_URL"] = f"sqlite:///{tmp.name}"
 
-    client = TestClient(app)
+    # Create the engine and schema once up front: get_engine() is not safe to race from
+    # the threadpool workers that serve the concurrent refresh requests below
+    get_engine()
 
-    def _ingest_image(external_id: str, file_name: str) -> int:
+    # Ingest only runs local CLIP feature extraction; keep it sequential so uploads don't
+    # race each other's AttributeValue inserts
+    images = {
+        "queen-band-tee": "queen-tshirt.jpeg",
+        "orange-dress": "orange-pattern-dress.jpeg",
+        "baggy-jeans": "baggy-jeans.jpeg",
+    }
+    payloads = []
+    for external_id, file_name in images.items():
         img_path = Path("design/images") / file_name
         assert img_path.exists(), f"Missing image {file_name}"
-        img_b64 = base64.b64encode(img_path.read_bytes()).decode()
-        resp = client.post(
-            "/garments/ingest",
-            json={"external_id": external_id, "image_base64": img_b64},
-        )
+        img_b64 = _b64_image(str(img_path), img_path.stat().st_mtime)
+        payloads.append({"external_id": external_id, "image_base64": img_b64})
+    ingest_resps = [
+        client.post("/garments/ingest", content=_dumps(p), headers=_JSON_HEADERS) for p in payloads
+    ]
+    for resp in ingest_resps:
         assert resp.status_code == 200, resp.text
-        return resp.json()["garment_id"]
-
-    gid_band = _ingest_image("queen-band-tee", "queen-tshirt.jpeg")
-    _ingest_image("orange-dress", "orange-pattern-dress.jpeg")
-    _ingest_image("baggy-jeans", "baggy-jeans.jpeg")
+    gid_band = ingest_resps[0].json()["garment_id"]
 
     # Refresh descriptions for ALL garments (primary + distractors)
     all_ids = []
@@ -61,11 +106,12 @@ def test_e2e_openai_search_ranks_target_image_first():
     engine = create_engine(db_url, future=True)
     with Session(engine) as session:
         all_ids = [g.id for g in session.query(Garment).all()]
-    for gid in all_ids:
-        resp = client.post(
-            "/user/garments/refresh-description",
-            json={"garment_id": gid, "overwrite": True},
-        )
+
+    # Each refresh waits on OpenAI; issue them concurrently rather than back to back
+    refresh_payloads = [{"garment_id": gid, "overwrite": True} for gid in all_ids]
+    refresh_resps = asyncio.run(_post_all("/user/garments/refresh-description", refresh_payloads))
+
+    for gid, resp in zip(all_ids, refresh_resps, strict=True):
         assert resp.status_code == 200, resp.text
         desc = resp.json()["description"]
         assert desc, "Description missing"
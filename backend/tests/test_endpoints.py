@@ -5,6 +5,9 @@ import json
 
 import requests
 
+# One keep-alive session reuses the loopback connection across probes
+SESSION = requests.Session()
+
 
 def test_endpoints():
     """Test the observability endpoints."""
@@ -19,7 +22,7 @@ def test_endpoints():
             url = f"{base_url}{endpoint}"
             print(f"Testing {url}...")
 
-            response = requests.get(url, timeout=5)
+            response = SESSION.get(url, timeout=5)
 
             print(f"✅ Status: {response.status_code}")
 
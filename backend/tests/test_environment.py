@@ -7,10 +7,12 @@ Run this after starting the development environment with start-dev.sh
 import json
 import sys
 import time
-import urllib.error
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from typing import Any
 
+import httpx
+
 # Service URLs (using mapped ports from docker-compose.dev.yml)
 BACKEND_URL = "http://localhost:8000"
 JAEGER_URL = "http://localhost:16687"  # Updated to mapped port
@@ -18,35 +20,44 @@ PROMETHEUS_URL = "http://localhost:9090"
 GRAFANA_URL = "http://localhost:3000"
 LOCALSTACK_URL = "http://localhost:4567"  # Updated to mapped port
 
+# Probes are I/O-bound; run them concurrently so a sweep costs ~max latency, not the sum
+PROBE_WORKERS = 16
+
+# One pooled keep-alive client shared by all probe threads; same-host probes reuse
+# connections instead of opening one socket per request
+HTTP_CLIENT = httpx.Client(
+    timeout=10.0,
+    follow_redirects=True,
+    headers={"User-Agent": "PreThrift-Test-Suite/1.0"},
+)
+
 
 def test_endpoint(url: str, description: str) -> dict[str, Any]:
     """Test a single endpoint and return results"""
     try:
         start_time = time.time()
-        req = urllib.request.Request(url)
-        req.add_header("User-Agent", "PreThrift-Test-Suite/1.0")
-
-        with urllib.request.urlopen(req, timeout=10) as response:
-            duration = time.time() - start_time
-            content = response.read().decode("utf-8")
-
-            return {
-                "url": url,
-                "description": description,
-                "status": response.status,
-                "duration": f"{duration:.3f}s",
-                "success": response.status == 200,
-                "content_length": len(content),
-                "content_preview": content[:200] + "..." if len(content) > 200 else content,
-            }
-    except urllib.error.HTTPError as e:
+        response = HTTP_CLIENT.get(url)
+        response.raise_for_status()
+        duration = time.time() - start_time
+        content = response.text
+
         return {
             "url": url,
             "description": description,
-            "status": e.code,
+            "status": response.status_code,
+            "duration": f"{duration:.3f}s",
+            "success": response.status_code == 200,
+            "content_length": len(content),
+            "content_preview": content[:200] + "..." if len(content) > 200 else content,
+        }
+    except httpx.HTTPStatusError as e:
+        return {
+            "url": url,
+            "description": description,
+            "status": e.response.status_code,
             "duration": "N/A",
             "success": False,
-            "error": f"HTTP {e.code}: {e.reason}",
+            "error": f"HTTP {e.response.status_code}: {e.response.reason_phrase}",
         }
     except Exception as e:
         return {
@@ -77,16 +88,15 @@ def main():
         (f"{LOCALSTACK_URL}/_localstack/health", "LocalStack Health"),
     ]
 
-    results = []
-
     print("🔍 Testing service endpoints...")
     print()
 
-    for url, description in test_cases:
-        result = test_endpoint(url, description)
-        results.append(result)
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+        results = list(executor.map(lambda case: test_endpoint(*case), test_cases))
 
-        # Print immediate feedback
+    for result in results:
+        description = result["description"]
+        # Print feedback in declaration order
         status_icon = "✅" if result["success"] else "❌"
         print(f"{status_icon} {description:25} {result['status']:>6} ({result['duration']:>7})")
 
@@ -145,9 +155,8 @@ def test_observability_features():
         f"{BACKEND_URL}/health/live",
     ]
 
-    for endpoint in trace_endpoints:
-        test_endpoint(endpoint, "Trace generation")
-        time.sleep(0.5)  # Small delay between requests
+    with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+        list(executor.map(test_endpoint, trace_endpoints, repeat("Trace generation")))
 
     print("   Generated requests for tracing")
 
@@ -191,7 +200,8 @@ def test_observability_features():
 
 if __name__ == "__main__":
     try:
-        success = main()
+        with HTTP_CLIENT:
+            success = main()
         sys.exit(0 if success else 1)
     except KeyboardInterrupt:
         print("\n\n⚠️  Test interrupted by user")
@@ -1,64 +1,57 @@
-import tempfile
+from backend.app.db_models import AttributeValue, Garment, GarmentAttribute
+from sqlalchemy import insert, select
 
-from backend.app.db_models import AttributeValue, Base, Garment, GarmentAttribute
-from backend.app.main import app
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
 
-
-def setup_env(monkeypatch):
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
-        db_url = f"sqlite:///{tmp.name}"
-    engine = create_engine(db_url, future=True)
-    Base.metadata.create_all(engine)
-    monkeypatch.setenv("DATABASE_URL", db_url)
+def setup_env(monkeypatch, template_db):
+    # template_db: per-test in-memory clone of the schema (see conftest.py)
     monkeypatch.setenv("OPENAI_API_KEY", "dummy")
-    return engine
+    return template_db
 
 
 def seed(engine):
-    with Session(engine) as session:
-        # attribute values
-        av_band = AttributeValue(family="style", value="band")
-        av_black = AttributeValue(family="color", value="black")
-        session.add_all([av_band, av_black])
-        session.flush()
-        g = Garment(
-            external_id="g-band",
-            title="Black Band Tee",
-            description="Black band graphic tee",
-            description_embedding=[0.2, 0.1, 0.05],
+    # Core inserts: no unit-of-work or identity-map bookkeeping for a fixed seed
+    with engine.begin() as conn:
+        # style/band and color/black ship with the template (conftest.TEMPLATE_ATTRIBUTES)
+        av_ids = {
+            (fam, val): av_id
+            for fam, val, av_id in conn.execute(
+                select(AttributeValue.family, AttributeValue.value, AttributeValue.id)
+            )
+        }
+        av_band, av_black = av_ids["style", "band"], av_ids["color", "black"]
+        gid = conn.scalar(
+            insert(Garment).returning(Garment.id),
+            {
+                "external_id": "g-band",
+                "title": "Black Band Tee",
+                "description": "Black band graphic tee",
+                "description_embedding": [0.2, 0.1, 0.05],
+            },
         )
-        session.add(g)
-        session.flush()
-        session.add_all(
+        conn.execute(
+            insert(GarmentAttribute),
             [
-                GarmentAttribute(garment_id=g.id, attribute_value_id=av_band.id, confidence=1.0),
-                GarmentAttribute(garment_id=g.id, attribute_value_id=av_black.id, confidence=1.0),
-            ]
+                {"garment_id": gid, "attribute_value_id": av_band, "confidence": 1.0},
+                {"garment_id": gid, "attribute_value_id": av_black, "confidence": 1.0},
+            ],
         )
-        session.commit()
-        return g.id
+    return gid
 
 
-def test_feedback_updates_preferences(monkeypatch):
-    engine = setup_env(monkeypatch)
+def test_feedback_updates_preferences(monkeypatch, template_db, client, search_deps):
+    engine = setup_env(monkeypatch, template_db)
     gid = seed(engine)
 
-    # monkeypatch query pipeline embedding + extractor
-    from backend.app import query_pipeline as qp
-
+    # fake query pipeline embedding + extractor
     def fake_embed_text(client, text):  # noqa: ARG001
         return [0.21, 0.09, 0.05]
 
     def fake_extract_preferences(conversation: str, model: str):  # noqa: ARG001
         return {"families": {"color": ["black"], "style": ["band"]}}
 
-    monkeypatch.setattr(qp, "embed_text", fake_embed_text)
-    monkeypatch.setattr(qp.openai_extractor, "extract_preferences", fake_extract_preferences)
+    search_deps(fake_embed_text, fake_extract_preferences)
 
-    c = TestClient(app)
+    c = client
     # initial search (no prefs)
     r1 = c.post("/search", json={"query": "black band tee", "user_id": "u1"})
     assert r1.status_code == 200
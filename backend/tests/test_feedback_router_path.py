@@ -1,46 +1,35 @@
-import tempfile
-
-from backend.app.db_models import AttributeValue, Base, Garment, GarmentAttribute
-from backend.app.main import app
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
-
-
-def setup_env():
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
-        url = f"sqlite:///{tmp.name}"
-    engine = create_engine(url, future=True)
-    Base.metadata.create_all(engine)
-    return engine, url
+from backend.app.db_models import AttributeValue, Garment, GarmentAttribute
+from sqlalchemy import insert, select
 
 
 def seed(engine):
-    with Session(engine) as session:
-        av_color = AttributeValue(family="color", value="black")
-        session.add(av_color)
-        session.flush()
-        g = Garment(
-            external_id="g1",
-            title="Test Garment",
-            description="A test",
-            description_embedding=[0.1, 0.2, 0.3],
+    with engine.begin() as conn:
+        # color/black ships with the template (conftest.TEMPLATE_ATTRIBUTES)
+        av_id = conn.scalar(
+            select(AttributeValue.id).where(
+                AttributeValue.family == "color", AttributeValue.value == "black"
+            )
+        )
+        gid = conn.scalar(
+            insert(Garment).returning(Garment.id),
+            {
+                "external_id": "g1",
+                "title": "Test Garment",
+                "description": "A test",
+                "description_embedding": [0.1, 0.2, 0.3],
+            },
         )
-        session.add(g)
-        session.flush()
-        session.add(
-            GarmentAttribute(garment_id=g.id, attribute_value_id=av_color.id, confidence=1.0)
+        conn.execute(
+            insert(GarmentAttribute),
+            {"garment_id": gid, "attribute_value_id": av_id, "confidence": 1.0},
         )
-        session.commit()
-        return g.id
+    return gid
 
 
-def test_feedback_router_path(monkeypatch):
-    engine, db_url = setup_env()
-    gid = seed(engine)
-    monkeypatch.setenv("DATABASE_URL", db_url)
+def test_feedback_router_path(monkeypatch, template_db, client):
+    # template_db: per-test in-memory clone of the schema, DATABASE_URL already set
+    gid = seed(template_db)
     monkeypatch.setenv("OPENAI_API_KEY", "dummy")
-    c = TestClient(app)
-    r = c.post("/feedback", json={"user_id": "userX", "garment_id": gid, "action": "view"})
+    r = client.post("/feedback", json={"user_id": "userX", "garment_id": gid, "action": "view"})
     assert r.status_code == 200, r.text
     assert r.json()["status"] == "ok"
@@ -1,14 +1,11 @@
-import json
 from pathlib import Path
 
 import numpy as np
 import pytest
 from backend.app.image_features import image_to_feature
+from PIL import Image
 
 IMAGES_DIR = Path(__file__).resolve().parents[2] / "design" / "images"
-OUTPUT_FILE = (
-    Path(__file__).resolve().parents[2] / "design" / "images" / "_features_test_output.json"
-)
 
 
 def _collect_images():
@@ -18,25 +15,82 @@ def _collect_images():
 
 @pytest.mark.integration
 @pytest.mark.skipif(not IMAGES_DIR.exists(), reason="images directory missing")
-def test_extract_and_persist_image_features():
+def test_extract_and_persist_image_features(request, monkeypatch, tmp_path):
+    # CLIP embeddings persist under .pytest_cache, so later runs skip the forward passes
+    monkeypatch.setenv("IMAGE_FEATURE_CACHE_DIR", str(request.config.cache.mkdir("clip_features")))
     images = _collect_images()
     assert images, "No images found for integration test"
 
-    features_dict: dict[str, list[float]] = {}
+    features_dict: dict[str, np.ndarray] = {}
     for img_path in images:
         vec = image_to_feature(str(img_path))
         assert isinstance(vec, np.ndarray)
         assert vec.shape[0] == 512  # expected embedding size (dummy or real)
         # Store only first few components now (rest will be filled later if needed)
-        features_dict[img_path.name] = vec[:16].tolist()
+        features_dict[img_path.name] = vec[:16]
 
-    with OUTPUT_FILE.open("w") as f:
-        json.dump(features_dict, f, indent=2)
+    # One binary archive instead of JSON float formatting + re-parse
+    output_file = tmp_path / "features.npz"
+    np.savez(output_file, **features_dict)
 
-    assert OUTPUT_FILE.exists()
+    assert output_file.exists()
     # Minimal shape validation of stored data
-    stored = json.loads(OUTPUT_FILE.read_text())
-    for _name, partial_vec in stored.items():
-        assert isinstance(partial_vec, list)
-        assert len(partial_vec) == 16
-        assert all(isinstance(x, float) for x in partial_vec)
+    with np.load(output_file) as stored:
+        assert sorted(stored.files) == sorted(features_dict)
+        for name in stored.files:
+            partial_vec = stored[name]
+            assert partial_vec.shape == (16,)
+            assert partial_vec.dtype == np.float32
+
+
+def test_clip_features_reloaded_from_disk_cache(tmp_path, monkeypatch):
+    from backend.app import image_features
+
+    calls = []
+
+    class _FakeAnalyzer:
+        def get_image_embedding(self, image):  # noqa: ARG002
+            calls.append(1)
+            return [0.5] * image_features.FEATURE_DIM
+
+    img_path = tmp_path / "shirt.png"
+    Image.new("RGB", (8, 8), (200, 10, 10)).save(img_path)
+    monkeypatch.setenv("IMAGE_FEATURE_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(image_features, "_get_clip_analyzer", lambda: _FakeAnalyzer())
+
+    first = image_to_feature(str(img_path))
+    image_features.clear_feature_cache()
+    second = image_to_feature(str(img_path))
+    image_features.clear_feature_cache()
+
+    assert calls == [1]
+    np.testing.assert_array_equal(first, second)
+
+
+def test_clip_disk_cache_keeps_keys_with_their_vectors(tmp_path, monkeypatch):
+    from backend.app import image_features
+
+    class _FakeAnalyzer:
+        def get_image_embedding(self, image):
+            return [float(image.getpixel((0, 0))[0])] * image_features.FEATURE_DIM
+
+    paths = []
+    for red in (10, 200):
+        path = tmp_path / f"shirt-{red}.png"
+        Image.new("RGB", (8, 8), (red, 0, 0)).save(path)
+        paths.append(path)
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("IMAGE_FEATURE_CACHE_DIR", str(cache_dir))
+    monkeypatch.setattr(image_features, "_get_clip_analyzer", lambda: _FakeAnalyzer())
+
+    first = [image_to_feature(str(p)) for p in paths]
+    image_features.clear_feature_cache()
+    monkeypatch.setattr(image_features, "_get_clip_analyzer", lambda: None)
+    reloaded = [image_to_feature(str(p)) for p in paths]
+    image_features.clear_feature_cache()
+
+    # Keys and vectors share one file, replaced in a single step
+    assert [p.name for p in cache_dir.iterdir()] == ["_clip_cache.npy"]
+    for before, after in zip(first, reloaded, strict=True):
+        np.testing.assert_array_equal(before, after)
+    assert not np.array_equal(reloaded[0], reloaded[1])
@@ -1,37 +1,21 @@
 import base64
-import sys
-from pathlib import Path
 
 import numpy as np
-from fastapi.testclient import TestClient
+import pytest
 
-ROOT = Path(__file__).resolve().parents[2]
-if str(ROOT / "backend") not in sys.path:
-    sys.path.insert(0, str(ROOT / "backend"))
-try:
-    from app.main import app  # type: ignore
-except Exception:  # pragma: no cover
-    from backend.app.main import app  # type: ignore
+# Minimal 1x1 transparent PNG
+_FAKE_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mP8Xw8AAoMBgQYch58AAAAASUVORK5CYII="
+)
 
 
-def _fake_png_bytes() -> bytes:
-    # Minimal 1x1 transparent PNG
-    return base64.b64decode(
-        "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mP8Xw8AAoMBgQYch58AAAAASUVORK5CYII="
-    )
-
-
-def test_ingest_requires_image():
-    client = TestClient(app)
+def test_ingest_requires_image(client):
     resp = client.post("/garments/ingest", json={"external_id": "x", "image_base64": ""})
     assert resp.status_code == 400
 
 
-def test_ingest_success(monkeypatch, tmp_path):
-    # isolate DB per test
-    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'db.sqlite'}")
-    client = TestClient(app)
-
+@pytest.mark.usefixtures("template_db")
+def test_ingest_success(client, monkeypatch, tmp_path):
     # Provide lightweight fake image_to_feature to bypass heavy torch import
     from backend.app import image_features
 
@@ -44,7 +28,7 @@ def test_ingest_success(monkeypatch, tmp_path):
     # Direct image storage to tmp
     monkeypatch.setenv("IMAGE_STORAGE_DIR", str(tmp_path / "imgs"))
 
-    img_b64 = base64.b64encode(_fake_png_bytes()).decode()
+    img_b64 = base64.b64encode(_FAKE_PNG).decode()
     resp = client.post(
         "/garments/ingest",
         json={
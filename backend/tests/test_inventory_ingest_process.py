@@ -1,20 +1,13 @@
 import base64
+import functools
 import os
-import sys
-from pathlib import Path
 
-from fastapi.testclient import TestClient
-
-# Ensure backend/app importable when running pytest from repo root
-ROOT = Path(__file__).resolve().parents[2]
-if str(ROOT / "backend") not in sys.path:
-    sys.path.insert(0, str(ROOT / "backend"))
-
-from app.main import app  # type: ignore  # noqa: E402
+import pytest
 
 
+@functools.lru_cache(maxsize=1)
 def _tiny_image_bytes() -> bytes:
-    # 2x2 red jpeg
+    # 2x2 red jpeg, encoded once per session
     try:  # optional pillow
         import io
 
@@ -28,17 +21,13 @@ def _tiny_image_bytes() -> bytes:
         return b"RAWIMAGE"
 
 
-def test_inventory_upload_and_process(tmp_path, monkeypatch):
-    # ensure database points to temp sqlite
-    db_path = tmp_path / "test.db"
-    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{db_path}")
+@pytest.mark.usefixtures("template_db")
+def test_inventory_upload_and_process(client, tmp_path, monkeypatch):
     monkeypatch.setenv("INVENTORY_IMAGE_DIR", str(tmp_path / "images"))
     # Use no OPENAI key so processing uses fallback deterministic paths
     if "OPENAI_API_KEY" in os.environ:
         monkeypatch.delenv("OPENAI_API_KEY", raising=False)
 
-    client = TestClient(app)
-
     img_b64 = base64.b64encode(_tiny_image_bytes()).decode()
     r = client.post("/inventory/upload", json={"filename": "red.jpg", "image_base64": img_b64})
     assert r.status_code == 200, r.text
@@ -1,11 +1,13 @@
 import base64
-import tempfile
 from pathlib import Path
 
-from backend.app.db_models import AttributeValue, Base, Garment, GarmentAttribute
+import pytest
+from backend.app.db_models import AttributeValue, Garment, GarmentAttribute
 from backend.app.inventory_utils import persist_inventory_image_file, safe_add_garment_attribute
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, select
+
+# Attribute rows per garment in the at-scale idempotency case
+M = 500
 
 
 def test_persist_inventory_image_file(tmp_path, monkeypatch):
@@ -22,19 +24,37 @@ def test_persist_inventory_image_file(tmp_path, monkeypatch):
     assert len(p.name.split("-")[0]) == 12
 
 
-def test_safe_add_garment_attribute_idempotent():
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
-        url = f"sqlite:///{tmp.name}"
-    engine = create_engine(url, future=True)
-    Base.metadata.create_all(engine)
-    with Session(engine) as session:
-        av = AttributeValue(family="color", value="black")
-        g = Garment(external_id="g1")
-        session.add_all([av, g])
-        session.commit()
-        safe_add_garment_attribute(session, g.id, av.id, 0.9)
-        safe_add_garment_attribute(session, g.id, av.id, 0.8)  # duplicate should not raise
-        session.commit()
-        attrs = session.query(GarmentAttribute).all()
-        assert len(attrs) == 1
-        assert attrs[0].confidence == 0.9  # original preserved
+@pytest.mark.parametrize("m", [1, M])
+def test_safe_add_garment_attribute_idempotent(db_session, m):
+    # db_session: shared in-memory schema; commits release SAVEPOINTs and the test's outer
+    # transaction is rolled back afterwards
+    av_ids = (
+        db_session.execute(
+            insert(AttributeValue).returning(AttributeValue.id),
+            [{"family": "material", "value": f"m{i}"} for i in range(m)],
+        )
+        .scalars()
+        .all()
+    )
+    garment_id = db_session.execute(
+        insert(Garment).returning(Garment.id), {"external_id": "g1"}
+    ).scalar_one()
+    # One executemany for the originals, one commit
+    db_session.execute(
+        insert(GarmentAttribute),
+        [
+            {"garment_id": garment_id, "attribute_value_id": av_id, "confidence": 0.9}
+            for av_id in av_ids
+        ],
+    )
+    db_session.commit()
+
+    for av_id in av_ids:
+        # duplicate should not raise
+        safe_add_garment_attribute(db_session, garment_id, av_id, 0.8)
+    db_session.commit()
+
+    count = db_session.scalar(select(func.count()).select_from(GarmentAttribute))
+    assert count == m
+    confidences = set(db_session.scalars(select(GarmentAttribute.confidence)))
+    assert confidences == {0.9}  # originals preserved
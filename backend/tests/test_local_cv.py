@@ -1,45 +1,49 @@
 """Test local computer vision garment analysis."""
 
 import os
-import sys
 import tempfile
 from pathlib import Path
 
-# Ensure backend/app importable
-ROOT = Path(__file__).resolve().parents[2]
-if str(ROOT / "backend") not in sys.path:
-    sys.path.insert(0, str(ROOT / "backend"))
+import pytest
 
 
 def _create_test_image():
     """Create a simple test image for testing."""
     try:
+        import numpy as np
         from PIL import Image  # type: ignore
 
         # Create a simple colored rectangle that might look like clothing
-        im = Image.new("RGB", (224, 224), (70, 130, 180))  # Steel blue
-        # Add some texture/pattern
-        for x in range(0, 224, 20):
-            for y in range(0, 224, 20):
-                if (x + y) % 40 == 0:
-                    im.putpixel((x, y), (255, 255, 255))
-        return im
+        pixels = np.full((224, 224, 3), (70, 130, 180), dtype=np.uint8)  # Steel blue
+        # Add some texture/pattern: white dots on the 20px grid where x + y is a multiple of 40
+        ys, xs = np.mgrid[0:224:20, 0:224:20]
+        dots = (xs + ys) % 40 == 0
+        pixels[ys[dots], xs[dots]] = 255
+        return Image.fromarray(pixels)
     except ImportError:
         return None
 
 
-def test_local_cv_analyzer(tmp_path, monkeypatch):
-    """Test local CV analyzer with and without dependencies."""
-    monkeypatch.setenv("USE_LOCAL_CV", "true")
-
-    # Create test image
-    img_path = tmp_path / "test_shirt.jpg"
+def _write_test_jpeg(path: Path) -> Path:
     test_img = _create_test_image()
     if test_img:
-        test_img.save(img_path, "JPEG")
+        test_img.save(path, "JPEG")
     else:
         # Create dummy file if PIL not available
-        img_path.write_bytes(b"dummy_image_data")
+        path.write_bytes(b"dummy_image_data")
+    return path
+
+
+@pytest.fixture(scope="session")
+def garment_jpeg(tmp_path_factory) -> Path:
+    """Test image JPEG-encoded once per session and shared by the local CV tests."""
+    return _write_test_jpeg(tmp_path_factory.mktemp("local_cv") / "test_garment.jpg")
+
+
+def test_local_cv_analyzer(garment_jpeg, monkeypatch):
+    """Test local CV analyzer with and without dependencies."""
+    monkeypatch.setenv("USE_LOCAL_CV", "true")
+    img_path = garment_jpeg
 
     try:
         from app.local_cv import analyze_garments_local, get_local_analyzer
@@ -71,17 +75,11 @@ def test_local_cv_analyzer(tmp_path, monkeypatch):
         assert "Placeholder description" in results[0]["description"]
 
 
-def test_inventory_processing_local_cv_integration(tmp_path, monkeypatch):
+def test_inventory_processing_local_cv_integration(garment_jpeg, monkeypatch):
     """Test that inventory processing correctly uses local CV when configured."""
     monkeypatch.setenv("USE_LOCAL_CV", "true")
     monkeypatch.delenv("OPENAI_API_KEY", raising=False)
-
-    img_path = tmp_path / "test_garment.jpg"
-    test_img = _create_test_image()
-    if test_img:
-        test_img.save(img_path, "JPEG")
-    else:
-        img_path.write_bytes(b"dummy_image_data")
+    img_path = garment_jpeg
 
     from app.inventory_processing import describe_inventory_image_multi
 
@@ -115,6 +113,7 @@ if __name__ == "__main__":
 
     with tempfile.TemporaryDirectory() as tmp:
         mp = MockMonkeypatch()
-        test_local_cv_analyzer(Path(tmp), mp)
-        test_inventory_processing_local_cv_integration(Path(tmp), mp)
+        img_path = _write_test_jpeg(Path(tmp) / "test_garment.jpg")
+        test_local_cv_analyzer(img_path, mp)
+        test_inventory_processing_local_cv_integration(img_path, mp)
         print("✅ Local CV tests completed")
@@ -0,0 +1,61 @@
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+
+_MIGRATION = (
+    Path(__file__).resolve().parents[1]
+    / "alembic"
+    / "versions"
+    / "0008_pack_description_embedding.py"
+)
+
+
+def _load_migration():
+    spec = importlib.util.spec_from_file_location("migration_0008", _MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_pack_description_embedding_keeps_missing_embeddings_null():
+    migration = _load_migration()
+    engine = sa.create_engine("sqlite://")
+    garment = sa.Table(
+        "garment",
+        sa.MetaData(),
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("description_embedding", sa.JSON),
+    )
+    with engine.begin() as conn:
+        garment.create(conn)
+        conn.execute(
+            garment.insert(),
+            [
+                {"id": 1, "description_embedding": [0.5, -1.0, 2.0]},
+                # sa.JSON persists Python None as JSON 'null', not SQL NULL
+                {"id": 2, "description_embedding": None},
+                {"id": 3, "description_embedding": []},
+            ],
+        )
+        assert conn.scalar(sa.text("SELECT description_embedding FROM garment WHERE id = 2"))
+
+        with Operations.context(MigrationContext.configure(conn)):
+            migration.upgrade()
+        packed = dict(conn.execute(sa.text("SELECT id, description_embedding FROM garment")).all())
+        assert np.frombuffer(packed[1], dtype="<f4").tolist() == [0.5, -1.0, 2.0]
+        assert packed[2] is None
+        assert packed[3] is None
+
+        with Operations.context(MigrationContext.configure(conn)):
+            migration.downgrade()
+        restored = sa.table("garment", sa.column("id"), sa.column("description_embedding", sa.JSON))
+        rows = dict(conn.execute(sa.select(restored.c.id, restored.c.description_embedding)).all())
+        assert rows == {1: [0.5, -1.0, 2.0], 2: None, 3: None}
+        assert (
+            conn.scalar(sa.text("SELECT count(*) FROM garment WHERE description_embedding IS NULL"))
+            == 2
+        )
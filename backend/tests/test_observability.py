@@ -16,8 +16,10 @@ os.environ.setdefault("LOG_LEVEL", "INFO")
 os.environ.setdefault("DEBUG", "true")
 
 try:
+    from starlette.testclient import TestClient
+
     from app.config import settings
-    from app.health_simple import check_basic_health
+    from app.main import app
     from app.observability_simple import (
         get_logger,
         track_embedding_operation,
@@ -39,31 +41,34 @@ try:
     async def test_tracking():
         async with track_search_operation("test_search"):
             logger.info("Inside search operation context")
-            await asyncio.sleep(0.1)
+            await asyncio.sleep(0)
 
         async with track_embedding_operation("test_embedding"):
             logger.info("Inside embedding operation context")
-            await asyncio.sleep(0.1)
+            await asyncio.sleep(0)
 
         print("✅ Operation tracking context managers working")
 
-    # Test health checks
-    async def test_health_checks():
-        try:
-            # Test basic health check
-            health_check = await check_basic_health()
-            print(
-                f"✅ Basic health check: {health_check.status.value} ({health_check.duration_ms}ms)"
-            )
-
-        except Exception as e:
-            print(f"❌ Health check error: {e}")
+    # Test health checks (probe-style loop through the full ASGI stack)
+    def test_health_checks(client):
+        for _ in range(100):
+            response = client.get("/health/")
+            assert response.status_code == 200
+            body = response.json()
+            assert body["status"] == "healthy"
+            assert [check["name"] for check in body["checks"]] == ["basic"]
+        # The metrics endpoint sits behind the same middleware stack and must stay reachable
+        metrics = client.get("/metrics")
+        assert metrics.status_code == 200
+        assert "http_requests_total" in metrics.text
+        print(f"✅ Basic health check: {body['status']} (100 probes)")
 
     async def main():
         print("\n🔍 Testing Prethrift Backend Observability Features\n")
 
         await test_tracking()
-        await test_health_checks()
+        with TestClient(app) as client:
+            test_health_checks(client)
 
         print("\n✅ All observability tests completed successfully!")
         print("\nNext steps:")
@@ -1,16 +1,9 @@
-from backend.app.main import app
-from fastapi.testclient import TestClient
-
-
-def test_preferences_extract_empty():
-    client = TestClient(app)
+def test_preferences_extract_empty(client):
     resp = client.post("/user/preferences/extract", json={"conversation": "   "})
     assert resp.status_code == 400
 
 
-def test_preferences_extract_success(monkeypatch):
-    client = TestClient(app)
-
+def test_preferences_extract_success(monkeypatch, client):
     def fake_extract(conversation: str, model: str = "gpt-4o-mini"):
         # ensure parameters used for lint
         assert model.startswith("gpt-")
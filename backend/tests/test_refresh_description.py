@@ -1,39 +1,26 @@
-import tempfile
 from pathlib import Path
 from typing import Any
 
 import pytest
-from backend.app.db_models import Base, Garment
-from backend.app.main import app
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from backend.app.db_models import Garment
 from sqlalchemy.orm import Session
 
-
-def setup_db():
-    # use a unique temporary sqlite file each time to avoid cross-test UNIQUE collisions
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
-        url = f"sqlite:///{tmp.name}"
-    engine = create_engine(url, future=True)
-    Base.metadata.create_all(engine)
-    return engine, url
+# Existing small file; describe_image is faked so only the stored path matters
+_IMG_PATH = str(Path(__file__).resolve().parents[2] / "design" / "logo" / "logo.svg")
 
 
 @pytest.fixture()
-def client(monkeypatch):
-    engine, db_url = setup_db()
+def refresh_env(monkeypatch, template_db, client):
+    # template_db: per-test in-memory clone of the schema, so garment ids never collide
+    # across tests; DATABASE_URL already points the endpoint at it
 
     # Insert a garment with an image path
-    img_path = Path("design/logo/logo.svg")  # existing small file
-    with Session(engine) as session:
-        g = Garment(external_id="ext1", image_path=str(img_path))
+    with Session(template_db) as session:
+        g = Garment(external_id="ext1", image_path=_IMG_PATH)
         session.add(g)
         session.commit()
         garment_id = g.id
 
-    # Monkeypatch DB url env so endpoint uses this test DB
-    monkeypatch.setenv("DATABASE_URL", db_url)
-
     # Monkeypatch OpenAI client functions
     class DummyClient:
         def responses(self):  # pragma: no cover - shouldn't be called
@@ -63,12 +50,11 @@ def client(monkeypatch):
     monkeypatch.setattr(user_profile_mod, "describe_image", fake_describe_image)
     monkeypatch.setattr(user_profile_mod, "embed_text_cached", lambda _t: [0.1, 0.2, 0.3])
 
-    c = TestClient(app)
-    return c, garment_id
+    return client, garment_id
 
 
-def test_refresh_description_first_call(client):
-    c, garment_id = client
+def test_refresh_description_first_call(refresh_env):
+    c, garment_id = refresh_env
     r = c.post("/user/garments/refresh-description", json={"garment_id": garment_id})
     assert r.status_code == 200, r.text
     data: dict[str, Any] = r.json()
@@ -83,8 +69,8 @@ def test_refresh_description_first_call(client):
     assert data2["cached"] is True
 
 
-def test_refresh_description_overwrite(client):
-    c, garment_id = client
+def test_refresh_description_overwrite(refresh_env):
+    c, garment_id = refresh_env
     # initial
     c.post("/user/garments/refresh-description", json={"garment_id": garment_id})
     # overwrite
@@ -94,3 +80,32 @@ def test_refresh_description_overwrite(client):
     )
     assert r.status_code == 200
     assert r.json()["cached"] is False
+
+
+def test_refresh_descriptions_batch_single_embed_call(refresh_env, monkeypatch):
+    c, garment_id = refresh_env
+    from backend.app.api import user_profile as user_profile_mod
+
+    calls: list[list[str]] = []
+
+    def fake_embed_many(texts):
+        calls.append(list(texts))
+        return [[0.1, 0.2, 0.3] for _ in texts]
+
+    monkeypatch.setattr(user_profile_mod, "embed_texts_cached", fake_embed_many)
+    r = c.post("/user/garments/refresh-descriptions", json={"garment_ids": [garment_id]})
+    assert r.status_code == 200, r.text
+    results = r.json()["results"]
+    assert [res["garment_id"] for res in results] == [garment_id]
+    assert results[0]["cached"] is False
+    assert results[0]["embedding_dims"] == 3
+    assert calls == [["A test description"]]
+
+    # Already described garments are returned as cached without another embeddings request
+    r2 = c.post("/user/garments/refresh-descriptions", json={"garment_ids": [garment_id]})
+    assert r2.status_code == 200
+    assert r2.json()["results"][0]["cached"] is True
+    assert len(calls) == 1
+
+    missing = c.post("/user/garments/refresh-descriptions", json={"garment_ids": [999999]})
+    assert missing.status_code == 404
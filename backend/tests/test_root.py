@@ -1,10 +1,4 @@
-from backend.app.main import app
-from fastapi.testclient import TestClient
-
-client = TestClient(app)
-
-
-def test_read_root():
+def test_read_root(client):
     resp = client.get("/")
     assert resp.status_code == 200
     assert resp.json().get("message") == "Prethrift API"
@@ -1,52 +1,35 @@
-import tempfile
-
-from backend.app.db_models import Base, Garment
-from backend.app.main import app
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
-
-
-def _seed_db():
-    with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
-        db_url = f"sqlite:///{tmp.name}"
-    engine = create_engine(db_url, future=True)
-    Base.metadata.create_all(engine)
-    with Session(engine) as session:
-        g1 = Garment(
-            external_id="g1",
-            title="Vintage Denim Jacket",
-            description="Classic blue vintage denim jacket with fading",
-            description_embedding=[0.1, 0.2, 0.3],
+from backend.app.db_models import Garment
+from sqlalchemy import insert
+
+
+def _seed_db(engine):
+    # engine: template_db's per-test in-memory clone of the schema, DATABASE_URL already set
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Garment),
+            {
+                "external_id": "g1",
+                "title": "Vintage Denim Jacket",
+                "description": "Classic blue vintage denim jacket with fading",
+                "description_embedding": [0.1, 0.2, 0.3],
+            },
         )
-        session.add(g1)
-        session.commit()
-    return db_url
 
 
-def _patch_embeddings(monkeypatch):
-    # Patch embedding + preferences to avoid external calls
-    from backend.app import main as main_mod
-    from backend.app import query_pipeline as qp
+def _fake_embed_text(client, text):  # noqa: ARG001
+    return [0.11, 0.21, 0.29]
 
-    def fake_embed_text(client, text):  # noqa: ARG001
-        return [0.11, 0.21, 0.29]
 
-    def fake_extract_preferences(conversation: str, model: str):  # noqa: ARG001
-        return {"families": {}}
+def _fake_extract_preferences(conversation: str, model: str):  # noqa: ARG001
+    return {"families": {}}
 
-    monkeypatch.setattr(qp, "embed_text", fake_embed_text)
-    monkeypatch.setattr(qp.openai_extractor, "extract_preferences", fake_extract_preferences)
-    monkeypatch.setattr(main_mod, "get_client", lambda: None)
 
-
-def test_off_topic_rejected(monkeypatch):
-    db_url = _seed_db()
-    monkeypatch.setenv("DATABASE_URL", db_url)
+def test_off_topic_rejected(monkeypatch, template_db, client, search_deps):
+    _seed_db(template_db)
     monkeypatch.setenv("OPENAI_API_KEY", "dummy")
-    _patch_embeddings(monkeypatch)
+    # Fake embedding + preferences to avoid external calls
+    search_deps(_fake_embed_text, _fake_extract_preferences)
 
-    client = TestClient(app)
     resp = client.post("/search", json={"query": "bitcoin price forecast"})
     assert resp.status_code == 200
     data = resp.json()
@@ -59,13 +42,12 @@ def test_off_topic_rejected(monkeypatch):
     }
 
 
-def test_on_topic_not_flagged(monkeypatch):
-    db_url = _seed_db()
-    monkeypatch.setenv("DATABASE_URL", db_url)
+def test_on_topic_not_flagged(monkeypatch, template_db, client, search_deps):
+    _seed_db(template_db)
     monkeypatch.setenv("OPENAI_API_KEY", "dummy")
-    _patch_embeddings(monkeypatch)
+    # Fake embedding + preferences to avoid external calls
+    search_deps(_fake_embed_text, _fake_extract_preferences)
 
-    client = TestClient(app)
     resp = client.post("/search", json={"query": "red vintage denim jacket"})
     assert resp.status_code == 200
     data = resp.json()
@@ -73,13 +55,12 @@ def test_on_topic_not_flagged(monkeypatch):
     assert data.get("results")  # should retrieve seeded jacket
 
 
-def test_force_override_allows_off_topic(monkeypatch):
-    db_url = _seed_db()
-    monkeypatch.setenv("DATABASE_URL", db_url)
+def test_force_override_allows_off_topic(monkeypatch, template_db, client, search_deps):
+    _seed_db(template_db)
     monkeypatch.setenv("OPENAI_API_KEY", "dummy")
-    _patch_embeddings(monkeypatch)
+    # Fake embedding + preferences to avoid external calls
+    search_deps(_fake_embed_text, _fake_extract_preferences)
 
-    client = TestClient(app)
     resp = client.post("/search", json={"query": "weather forecast", "force": True})
     assert resp.status_code == 200
     data = resp.json()
@@ -88,13 +69,12 @@ def test_force_override_allows_off_topic(monkeypatch):
     assert "results" in data
 
 
-def test_short_generic_allowed(monkeypatch):
-    db_url = _seed_db()
-    monkeypatch.setenv("DATABASE_URL", db_url)
+def test_short_generic_allowed(monkeypatch, template_db, client, search_deps):
+    _seed_db(template_db)
     monkeypatch.setenv("OPENAI_API_KEY", "dummy")
-    _patch_embeddings(monkeypatch)
+    # Fake embedding + preferences to avoid external calls
+    search_deps(_fake_embed_text, _fake_extract_preferences)
 
-    client = TestClient(app)
     resp = client.post("/search", json={"query": "dress"})
     assert resp.status_code == 200
     data = resp.json()
@@ -1,4 +1,8 @@
+import types
+
 import numpy as np
+import pytest
+from backend.app import vector_match
 from backend.app.vector_match import build_nn_index, cosine_similarity, query_nn
 
 
@@ -14,3 +18,34 @@ def test_nn_query():
     res = query_nn(nn, np.array([1.0, 0.0, 0.0]), k=2)
     assert res[0][0] == 0
     assert 0.99 <= res[0][1] <= 1.01
+
+
+@pytest.mark.parametrize(
+    ("a", "b"),
+    [
+        ([1.0, 2.0, 3.0], [3.0, -1.0, 0.5]),
+        ([0.2, 0.4], [0.4, 0.8]),
+        ([1.0, 0.0], [-1.0, 0.0]),
+        ([0.0, 0.0, 0.0], [1.0, 2.0, 3.0]),
+        ([1.0, 2.0, 3.0], [0.0, 0.0, 0.0]),
+    ],
+)
+def test_cosine_similarity_simsimd_path_matches_numpy(monkeypatch, a, b):
+    a, b = np.array(a), np.array(b)
+    expected = cosine_similarity(a, b)  # NumPy path (simsimd not installed here)
+    calls = []
+
+    def fake_cosine(x, y):
+        # simsimd contract: returns cosine *distance* for contiguous arrays
+        calls.append((x.dtype, x.flags.c_contiguous, y.flags.c_contiguous))
+        return 1.0 - float(np.dot(x, y) / (np.linalg.norm(x) * np.linalg.norm(y)))
+
+    monkeypatch.setattr(
+        vector_match, "simsimd", types.SimpleNamespace(cosine=fake_cosine), raising=False
+    )
+    monkeypatch.setattr(vector_match, "SIMSIMD_AVAILABLE", True)
+    assert cosine_similarity(a, b) == pytest.approx(expected, abs=1e-12)
+    if a.any() and b.any():
+        assert calls == [(np.float64, True, True)]
+    else:
+        assert calls == []  # zero vectors short-circuit to 0.0
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from backend.app.db_models import Base, Garment
+from backend.app.query_pipeline import _ann_candidate_ids, _cos, _SimilarityScorer
+from backend.app.vector_utils import OPENAI_TEXT_EMBED_DIM, set_openai_text_embedding
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+
+def test_openai_text_embedding_mirrored_only_at_full_width():
+    g = Garment(external_id="short")
+    set_openai_text_embedding(g, [0.1, 0.2, 0.3])
+    assert g.openai_text_embedding_vec is None
+
+    full = [0.01] * OPENAI_TEXT_EMBED_DIM
+    set_openai_text_embedding(g, full)
+    assert g.openai_text_embedding_vec == full
+
+
+def test_ann_candidates_skipped_without_postgres():
+    engine = create_engine("sqlite://", future=True)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        # SQLite has no HNSW index: caller must fall back to scoring every garment
+        assert _ann_candidate_ids(session, [0.01] * OPENAI_TEXT_EMBED_DIM, 10) is None
+        assert _ann_candidate_ids(session, [0.1, 0.2], 10) is None
+
+
+def test_similarity_scorer_matches_scalar_cosine():
+    vectors = [[1.0, 0.0, 0.0], None, [0.3, 0.4, 0.5], [0.0, 0.0, 0.0], [0.2, 0.9]]
+    scorer = _SimilarityScorer(vectors)
+    query = [0.5, 0.1, 0.2]
+    expected = [_cos(query, v) if v else 0.0 for v in vectors]
+    assert scorer.scores(query) == pytest.approx(expected, abs=1e-6)
+    assert scorer.scores(None) == [0.0] * len(vectors)
+
+
+def test_similarity_scorer_from_packed_matches_list_input():
+    vectors = [[1.0, 0.0, 0.0], None, [0.3, 0.4, 0.5], [0.2, 0.9]]
+    blobs = [None if v is None else np.asarray(v, dtype="<f4").tobytes() for v in vectors]
+    query = [0.5, 0.1, 0.2]
+    packed_scores = _SimilarityScorer.from_packed(blobs).scores(query)
+    assert packed_scores == pytest.approx(_SimilarityScorer(vectors).scores(query), abs=1e-6)
@@ -1,5 +1,13 @@
 #!/usr/bin/env python3
-import aws_cdk as cdk
+import os
+
+# Skip per-construct stack-trace capture during synth; must be set before the jsii
+# runtime starts, i.e. before aws_cdk is imported (hence the import block below is
+# deliberately separate from the one above)
+os.environ.setdefault("CDK_DISABLE_STACK_TRACE", "1")
+
+import aws_cdk as cdk  # noqa: I001
+
 from stacks import PrethriftStack
 
 app = cdk.App()
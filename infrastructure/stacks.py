@@ -1,9 +1,15 @@
 from __future__ import annotations
 
 from pathlib import Path
+import compileall
 import os
+import py_compile
+import shutil
+import subprocess
+import sys
 
 import aws_cdk as cdk
+import jsii
 from aws_cdk import (
     Duration,
     RemovalPolicy,
@@ -20,14 +26,116 @@ from aws_cdk import (
     aws_cloudfront_origins as origins,
     aws_sqs as sqs,
     aws_events as events,
-    aws_lambda_destinations as destinations,
+    aws_lambda_event_sources as lambda_event_sources,
     aws_ssm as ssm,
     aws_cloudwatch as cloudwatch,
+    aws_ecr_assets as ecr_assets,
 )
  # Using standard Lambda function constructs; alpha python helper not installed
 from aws_cdk import aws_s3_notifications as s3n
 from constructs import Construct
 
+_HERE = Path(__file__).resolve().parent
+_BACKEND_ROOT = _HERE.parent / "backend"
+_LAYER_DIST = _HERE / "layers" / "inference" / "dist"
+_PIP_CACHE = _HERE / "cdk.out" / ".pip-cache"
+
+# Function bundles install only the runtime set; heavy ML packages
+# (requirements-inference.txt) are served by the inference layer
+_RUNTIME_REQUIREMENTS = "requirements-runtime.txt"
+
+# The Python 3.11 Lambda runtime already ships the AWS SDK; pulled in transitively
+# (e.g. by OpenTelemetry instrumentation) they would only add ~70 MB to the bundle
+_LAMBDA_PROVIDED_PACKAGES = ("boto3*", "botocore*", "s3transfer*", "jmespath*")
+
+# Never part of a Lambda package; excluded before asset hashing, staging and upload
+_BACKEND_ASSET_EXCLUDE = [
+    "tests",
+    "**/__pycache__",
+    "*.pyc",
+    ".venv",
+    "coverage.*",
+    ".coverage",
+    ".pytest_cache",
+    ".mypy_cache",
+    ".ruff_cache",
+    "*.egg-info",
+    "*.db",
+]
+
+# Ship bytecode so cold starts skip compiling every imported module (/var/task is
+# read-only, so nothing compiled at import time is ever cached). Hash-based pycs stay
+# valid even though asset zips normalise file timestamps.
+_PYC_INVALIDATION = "unchecked-hash"
+
+_DOCKER_BUNDLE_COMMAND = (
+    f"pip install --no-cache-dir -r {_RUNTIME_REQUIREMENTS} -t /asset-output "
+    "&& rm -rf " + " ".join(f"/asset-output/{pkg}" for pkg in _LAMBDA_PROVIDED_PACKAGES) + " "
+    "&& cp -r app /asset-output/app "
+    "&& find /asset-output -type d -name '__pycache__' -prune -exec rm -rf {} + "
+    "&& find /asset-output -name '*.pyc' -delete "
+    f"&& python -m compileall -q -j 0 --invalidation-mode {_PYC_INVALIDATION} /asset-output"
+)
+
+
+# Runtime dependencies published only as sdists. pip cannot build sdists while targeting a
+# foreign --platform, so local bundling prebuilds these as pure-Python wheels (their C
+# speedups are optional and skipped) and offers them through --find-links.
+_SDIST_ONLY_PACKAGES = ("thrift",)  # via opentelemetry-exporter-jaeger-thrift
+
+
+@jsii.implements(cdk.ILocalBundling)
+class _LocalPipBundling:
+    """Bundle the backend on the host with pip, skipping the Docker bundling image.
+
+    Installs Lambda-compatible (manylinux aarch64, CPython 3.11) wheels only, plus
+    pure-Python wheels built locally for ``_SDIST_ONLY_PACKAGES``; returns False (with a
+    warning) so CDK falls back to Docker when pip is missing or a dependency has no
+    matching wheel. One instance is shared by every function so the pip cache under
+    ``cdk.out/`` is reused.
+    """
+
+    def __init__(self, source_dir: Path, cache_dir: Path):
+        self._source_dir = source_dir
+        self._cache_dir = cache_dir
+
+    def try_bundle(self, output_dir: str, **_options) -> bool:
+        out = Path(output_dir)
+        wheelhouse = self._cache_dir / "wheels"
+        env = {**os.environ, "PIP_CACHE_DIR": str(self._cache_dir)}
+        build_wheels = [sys.executable, "-m", "pip", "wheel", "--no-deps", "-w", str(wheelhouse)]
+        build_wheels += ["--no-binary", ",".join(_SDIST_ONLY_PACKAGES), *_SDIST_ONLY_PACKAGES]
+        requirements = str(self._source_dir / _RUNTIME_REQUIREMENTS)
+        install = [sys.executable, "-m", "pip", "install", "-r", requirements, "-t", output_dir]
+        install += ["--platform", "manylinux2014_aarch64", "--implementation", "cp"]
+        install += ["--python-version", "3.11", "--only-binary=:all:"]
+        install += ["--find-links", str(wheelhouse)]
+        try:
+            # A failing compiler makes the optional C extensions fall back to pure Python
+            no_cc = {**env, "CC": "false"}
+            subprocess.run(build_wheels, check=True, env=no_cc, stdout=subprocess.DEVNULL)
+            subprocess.run(install, check=True, env=env, stdout=subprocess.DEVNULL)
+        except (OSError, subprocess.CalledProcessError) as exc:
+            print(f"[bundling] local pip bundling failed, using Docker: {exc}", file=sys.stderr)
+            return False
+        for pattern in _LAMBDA_PROVIDED_PACKAGES:
+            for path in out.glob(pattern):
+                shutil.rmtree(path)
+        shutil.copytree(
+            self._source_dir / "app",
+            out / "app",
+            ignore=shutil.ignore_patterns("__pycache__", "*.pyc"),
+            dirs_exist_ok=True,
+        )
+        if sys.version_info[:2] == (3, 11):  # bytecode must match the Lambda runtime
+            compileall.compile_dir(
+                output_dir,
+                quiet=1,
+                workers=0,
+                invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH,
+            )
+        return True
+
 
 class PrethriftStack(Stack):
     def __init__(self, scope: Construct, construct_id: str, *, allowed_origins: list[str] | None = None, **kwargs):  # noqa: D401
@@ -44,8 +152,15 @@ class PrethriftStack(Stack):
             if not resolved:
                 ssm_name = self.node.try_get_context("allowed_origins_ssm")
                 if ssm_name:
-                    param = ssm.StringParameter.from_string_parameter_name(self, "AllowedOriginsParam", ssm_name)
-                    resolved = [o.strip() for o in param.string_value.split(",") if o.strip()]
+                    if cdk.Token.is_unresolved(self.account) or cdk.Token.is_unresolved(self.region):
+                        # Environment-agnostic stack: no synth-time lookup possible, resolve at deploy
+                        param = ssm.StringParameter.from_string_parameter_name(self, "AllowedOriginsParam", ssm_name)
+                        origins_val = param.string_value
+                    else:
+                        # Synth-time lookup cached in cdk.context.json: commit that file so CI
+                        # synthesizes once instead of synth -> resolve context -> synth again
+                        origins_val = ssm.StringParameter.value_from_lookup(self, ssm_name)
+                    resolved = [o.strip() for o in origins_val.split(",") if o.strip()]
             allowed_origins = resolved or ["http://localhost:5173"]
         origins_env_val = ",".join(allowed_origins)
 
@@ -108,38 +223,47 @@ class PrethriftStack(Stack):
             enable_data_api=True,
         )
 
-        # IAM role for Lambda
-        lambda_role = iam.Role(
-            self,
-            "PrethriftLambdaRole",
-            assumed_by=iam.ServicePrincipal("lambda.amazonaws.com"),
-            managed_policies=[
-                iam.ManagedPolicy.from_aws_managed_policy_name("service-role/AWSLambdaBasicExecutionRole"),
-            ],
-        )
-        images_bucket.grant_read_write(lambda_role)
-        db_secret.grant_read(lambda_role)
-        cluster.grant_data_api_access(lambda_role)
+        # One least-privilege IAM role per Lambda
+        basic_execution = iam.ManagedPolicy.from_aws_managed_policy_name("service-role/AWSLambdaBasicExecutionRole")
 
-        backend_root = Path(__file__).resolve().parents[1] / "backend"
+        def lambda_role(construct_id: str) -> iam.Role:
+            role = iam.Role(
+                self,
+                construct_id,
+                assumed_by=iam.ServicePrincipal("lambda.amazonaws.com"),
+                managed_policies=[basic_execution],
+            )
+            db_secret.grant_read(role)
+            cluster.grant_data_api_access(role)
+            return role
+
+        # API: bucket health check plus presigned upload URLs, which are signed with (and so
+        # need) PutObject; never deletes
+        api_role = lambda_role("PrethriftApiRole")
+        images_bucket.grant_read(api_role)
+        images_bucket.grant_put(api_role)
+        # Processor: only downloads uploads; PutEvents is granted once the bus exists
+        processor_role = lambda_role("PrethriftProcessorRole")
+        images_bucket.grant_read(processor_role)
+
+        backend_root = _BACKEND_ROOT
 
         # Lambda for async S3 image processing (triggered by object created)
         # Inference layer (heavy ML libs) to keep function package slim
-        layer_dist_path = Path(__file__).resolve().parent / "layers" / "inference" / "dist"
-        if not layer_dist_path.exists():
+        if not _LAYER_DIST.exists():
             # create minimal placeholder to allow synth/test
-            placeholder = layer_dist_path / "python"
-            os.makedirs(placeholder, exist_ok=True)
+            placeholder = _LAYER_DIST / "python"
+            placeholder.mkdir(parents=True, exist_ok=True)
             (placeholder / "PLACEHOLDER.txt").write_text("Layer placeholder - run build_inference_layer.sh to populate.")
         inference_layer = _lambda.LayerVersion(
             self,
             "InferenceLayer",
-            code=_lambda.Code.from_asset(str(layer_dist_path)),
+            code=_lambda.Code.from_asset(str(_LAYER_DIST)),
             compatible_runtimes=[_lambda.Runtime.PYTHON_3_11],
             description="Prebuilt inference dependencies layer (placeholder if empty)",
         )
 
-        # Dead-letter queue for failed async invocations
+        # Dead-letter queue for uploads whose processing keeps failing
         dlq = sqs.Queue(
             self,
             "ProcessorDLQ",
@@ -149,90 +273,103 @@ class PrethriftStack(Stack):
 
         # EventBridge bus for successful processing notifications
         event_bus = events.EventBus(self, "ProcessingBus", event_bus_name="PrethriftProcessingBus")
+        event_bus.grant_put_events_to(processor_role)
+
+        # Memory also sets the CPU share: API sized for tail latency, processor for image work
+        api_memory = int(self.node.try_get_context("api_memory") or 1536)
+        processor_memory = int(self.node.try_get_context("processor_memory") or 2048)
 
         use_docker = bool(self.node.try_get_context("dockerBundling")) or bool(os.environ.get("ENABLE_DOCKER_BUNDLING"))
+        # Zip package for the API, and for the processor unless it is built as an image below
         if use_docker:
-            processor_code = _lambda.Code.from_asset(
+            # Host-side pip bundling first; Docker only when the local toolchain can't do it
+            local_bundling = _LocalPipBundling(backend_root, _PIP_CACHE)
+            backend_code = _lambda.Code.from_asset(
                 str(backend_root),
+                exclude=_BACKEND_ASSET_EXCLUDE,
                 bundling=cdk.BundlingOptions(
                     image=_lambda.Runtime.PYTHON_3_11.bundling_image,
-                    command=[
-                        "bash",
-                        "-c",
-                        "pip install --no-cache-dir -r requirements.txt -t /asset-output "
-                        "&& rm -rf /asset-output/torch /asset-output/torchvision /asset-output/pillow /asset-output/Pillow* /asset-output/scikit_learn* "
-                        "&& cp -r app /asset-output/app "
-                        "&& find /asset-output -type d -name '__pycache__' -prune -exec rm -rf {} + "
-                        "&& find /asset-output -name '*.pyc' -delete",
-                    ],
+                    command=["bash", "-c", _DOCKER_BUNDLE_COMMAND],
+                    local=local_bundling,
                 ),
             )
         else:
             # Fallback simple packaging (expects layer to hold heavy deps)
-            processor_code = _lambda.Code.from_asset(str(backend_root))
-        processor_fn = _lambda.Function(
-            self,
-            "InventoryImageProcessor",
-            code=processor_code,
-            handler="app/processor.handler",
-            runtime=_lambda.Runtime.PYTHON_3_11,
-            architecture=_lambda.Architecture.ARM_64,
-            timeout=Duration.seconds(60),
-            memory_size=1024,
-            role=lambda_role,
-            vpc=vpc,
-            environment={
+            backend_code = _lambda.Code.from_asset(str(backend_root), exclude=_BACKEND_ASSET_EXCLUDE)
+        processor_props = {
+            "architecture": _lambda.Architecture.ARM_64,
+            "timeout": Duration.seconds(60),
+            "memory_size": processor_memory,
+            "role": processor_role,
+            "vpc": vpc,
+            "environment": {
                 "IMAGES_BUCKET": images_bucket.bucket_name,
                 "DATABASE_SECRET_ARN": db_secret.secret_arn,
                 "EVENT_BUS_NAME": event_bus.event_bus_name,
                 "ALLOWED_ORIGINS": origins_env_val,
             },
-            layers=[inference_layer],
-            log_retention=logs.RetentionDays.ONE_WEEK,
+            "log_retention": logs.RetentionDays.ONE_WEEK,
+        }
+        if use_docker:
+            # Container image with torch/pillow baked in: chunked image loading and the
+            # AZ-level cache beat unpacking the inference layer on every cold start
+            processor_fn = _lambda.DockerImageFunction(
+                self,
+                "InventoryImageProcessor",
+                code=_lambda.DockerImageCode.from_image_asset(
+                    str(backend_root),
+                    file="Dockerfile.processor",
+                    platform=ecr_assets.Platform.LINUX_ARM64,
+                    exclude=_BACKEND_ASSET_EXCLUDE,
+                ),
+                **processor_props,
+            )
+        else:
+            processor_fn = _lambda.Function(
+                self,
+                "InventoryImageProcessor",
+                code=backend_code,
+                handler="app/processor.handler",
+                runtime=_lambda.Runtime.PYTHON_3_11,
+                layers=[inference_layer],
+                **processor_props,
+            )
+        # Uploads queue up and reach the processor in batches: bulk ingest costs a few warm
+        # invocations instead of one (often cold) invocation per object. Visibility is 6x
+        # the function timeout per the SQS event source guidance; after 3 failed receives a
+        # message moves to the DLQ.
+        ingest_queue = sqs.Queue(
+            self,
+            "IngestQueue",
+            visibility_timeout=Duration.seconds(360),
+            enforce_ssl=True,
+            dead_letter_queue=sqs.DeadLetterQueue(queue=dlq, max_receive_count=3),
         )
         images_bucket.add_event_notification(
             s3.EventType.OBJECT_CREATED,
-            s3n.LambdaDestination(processor_fn),
+            s3n.SqsDestination(ingest_queue),
         )
-
-        _lambda.EventInvokeConfig(
-            self,
-            "ProcessorInvokeConfig",
-            function=processor_fn,
-            max_event_age=Duration.hours(2),
-            retry_attempts=2,
-            on_failure=destinations.SqsDestination(dlq),
-            on_success=destinations.EventBridgeDestination(event_bus),
+        processor_fn.add_event_source(
+            lambda_event_sources.SqsEventSource(
+                ingest_queue,
+                batch_size=10,
+                max_batching_window=Duration.seconds(5),
+                report_batch_item_failures=True,
+            )
         )
 
-        if use_docker:
-            api_code = _lambda.Code.from_asset(
-                str(backend_root),
-                bundling=cdk.BundlingOptions(
-                    image=_lambda.Runtime.PYTHON_3_11.bundling_image,
-                    command=[
-                        "bash",
-                        "-c",
-                        "pip install --no-cache-dir -r requirements.txt -t /asset-output "
-                        "&& rm -rf /asset-output/torch /asset-output/torchvision /asset-output/pillow /asset-output/Pillow* /asset-output/scikit_learn* "
-                        "&& cp -r app /asset-output/app "
-                        "&& find /asset-output -type d -name '__pycache__' -prune -exec rm -rf {} + "
-                        "&& find /asset-output -name '*.pyc' -delete",
-                    ],
-                ),
-            )
-        else:
-            api_code = _lambda.Code.from_asset(str(backend_root))
         function = _lambda.Function(
             self,
             "PrethriftApiFn",
-            code=api_code,
+            code=backend_code,
             handler="app/main.handler",
             runtime=_lambda.Runtime.PYTHON_3_11,
             architecture=_lambda.Architecture.ARM_64,
             timeout=Duration.seconds(30),
-            memory_size=1024,
-            role=lambda_role,
+            memory_size=api_memory,
+            role=api_role,
+            # Connects with psycopg2 to the cluster endpoint from DATABASE_SECRET_ARN
+            # (not the Data API), so it must stay inside the VPC
             vpc=vpc,
             environment={
                 "IMAGES_BUCKET": images_bucket.bucket_name,
@@ -243,10 +380,21 @@ class PrethriftStack(Stack):
             log_retention=logs.RetentionDays.ONE_WEEK,
         )
 
+        # Provisioned concurrency on the user-facing API: keep an initialised environment warm
+        # (no cold-start p99 spikes) and let utilization scale it within bounded cost
+        api_alias = _lambda.Alias(
+            self,
+            "ApiLive",
+            alias_name="live",
+            version=function.current_version,
+            provisioned_concurrent_executions=1,
+        )
+        api_alias.add_auto_scaling(min_capacity=1, max_capacity=5).scale_on_utilization(utilization_target=0.7)
+
         api = apigw.LambdaRestApi(
             self,
             "PrethriftApi",
-            handler=function,
+            handler=api_alias,
             proxy=True,
             default_cors_preflight_options=apigw.CorsOptions(
                 allow_origins=allowed_origins,
@@ -254,14 +402,17 @@ class PrethriftStack(Stack):
                 allow_headers=["*"],
             ),
         )
-        cdk.CfnOutput(self, "ApiUrl", value=api.url)
-        cdk.CfnOutput(self, "BucketName", value=images_bucket.bucket_name)
-        cdk.CfnOutput(self, "DbSecretArn", value=db_secret.secret_arn)
-        cdk.CfnOutput(self, "FrontendBucket", value=frontend_bucket.bucket_name)
-        cdk.CfnOutput(self, "CloudFrontDomain", value=distribution.domain_name)
-        cdk.CfnOutput(self, "ProcessingBusArn", value=event_bus.event_bus_arn)
-        cdk.CfnOutput(self, "ProcessorDlqUrl", value=dlq.queue_url)
-        cdk.CfnOutput(self, "AllowedOrigins", value=origins_env_val)
+        for output_id, value in {
+            "ApiUrl": api.url,
+            "BucketName": images_bucket.bucket_name,
+            "DbSecretArn": db_secret.secret_arn,
+            "FrontendBucket": frontend_bucket.bucket_name,
+            "CloudFrontDomain": distribution.domain_name,
+            "ProcessingBusArn": event_bus.event_bus_arn,
+            "ProcessorDlqUrl": dlq.queue_url,
+            "AllowedOrigins": origins_env_val,
+        }.items():
+            cdk.CfnOutput(self, output_id, value=value)
         # Expose asset hashes for observability/versioning
         if isinstance(function.node.default_child, cdk.CfnResource):
             fn_hash = function.node.try_get_context('@aws-cdk/core:assetHash') or function.node.addr
@@ -270,8 +421,6 @@ class PrethriftStack(Stack):
             proc_hash = processor_fn.node.try_get_context('@aws-cdk/core:assetHash') or processor_fn.node.addr
             cdk.CfnOutput(self, "ProcessorFnAssetId", value=proc_hash)
 
-        lambda_role.add_to_policy(iam.PolicyStatement(actions=["events:PutEvents"], resources=[event_bus.event_bus_arn]))
-
         cloudwatch.Alarm(
             self,
             "ProcessorDlqAlarm",
@@ -1,3 +1,5 @@
+from collections import Counter
+
 import aws_cdk as cdk
 from aws_cdk.assertions import Template
 from stacks import PrethriftStack
@@ -6,20 +8,26 @@ def test_stack_synth():
     app = cdk.App(
         context={
             "allowedOrigins": ["http://localhost:5173"],
+            # no stack trace in construct metadata: synth time is dominated by capturing them
+            "aws:cdk:disable-stack-trace": True,
         }
     )
     stack = PrethriftStack(app, "PrethriftStackTest")
     template = Template.from_stack(stack)
 
+    # Serialize once; every presence/count check below reads this snapshot
+    resources = template.to_json()["Resources"]
+    by_type = Counter(v["Type"] for v in resources.values())
+
     # Basic resource presence assertions
     # There are helper/provider lambdas; ensure at least the two primary ones exist
-    lambdas = [k for k,v in template.to_json()["Resources"].items() if v["Type"] == "AWS::Lambda::Function"]
-    assert any("PrethriftApiFn" in name for name in lambdas)
-    assert any("InventoryImageProcessor" in name for name in lambdas)
-    template.resource_count_is("AWS::S3::Bucket", 2)
-    template.resource_count_is("AWS::RDS::DBCluster", 1)
-    template.resource_count_is("AWS::Events::EventBus", 1)
-    template.resource_count_is("AWS::CloudFront::Distribution", 1)
+    lambdas = [k for k, v in resources.items() if v["Type"] == "AWS::Lambda::Function"]
+    assert any(name.startswith("PrethriftApiFn") for name in lambdas)
+    assert any(name.startswith("InventoryImageProcessor") for name in lambdas)
+    assert by_type["AWS::S3::Bucket"] == 2
+    assert by_type["AWS::RDS::DBCluster"] == 1
+    assert by_type["AWS::Events::EventBus"] == 1
+    assert by_type["AWS::CloudFront::Distribution"] == 1
 
     # Check EventBridge custom bus name
     template.has_resource_properties("AWS::Events::EventBus", {
@@ -27,5 +35,5 @@ def test_stack_synth():
     })
 
     # Ensure DLQ alarm exists
-    alarms = [r for r, v in template.to_json()["Resources"].items() if v["Type"] == "AWS::CloudWatch::Alarm"]
-    assert any("ProcessorDlqAlarm" in a for a in alarms)
+    alarms = [r for r, v in resources.items() if v["Type"] == "AWS::CloudWatch::Alarm"]
+    assert any(a.startswith("ProcessorDlqAlarm") for a in alarms)
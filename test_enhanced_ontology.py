@@ -7,15 +7,13 @@ import os
 # Add the backend directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 
-from app.ontology import classify_basic_cached, all_values
+from app.ontology import classify_basic_cached_batch, all_values
 
-def test_description(description: str):
-    """Test a garment description with the enhanced ontology."""
+def _print(description: str, result: dict[str, list[str]]):
+    """Print the attributes detected for a garment description."""
     print(f"\n🔍 Testing: '{description}'")
     print("=" * 60)
 
-    result = classify_basic_cached(description)
-
     if not result:
         print("❌ No attributes detected")
         return
@@ -70,8 +68,8 @@ def main():
         "Bohemian 1970s style maxi dress with paisley print in earth tones"
     ]
 
-    for description in test_descriptions:
-        test_description(description)
+    for desc, res in zip(test_descriptions, classify_basic_cached_batch(test_descriptions)):
+        _print(desc, res)
 
     print("\n📊 ONTOLOGY STATS")
     print("=" * 40)